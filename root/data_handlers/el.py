@@ -1,36 +1,98 @@
+import os
 import csv
 import json
 import pyarrow as pa
+import pyarrow.csv as pa_csv
 import pyarrow.parquet as pq
 import pandas as pd
 from io import BytesIO
-from typing import Union, Callable, Any
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, Callable, Any, ContextManager, Dict, Optional
+
+from data_handlers import json_stream
+from data_handlers.sinks import Sink, WebHdfsSink
+
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
 
 
 class HdfsEL:
-    def __init__(self, hdfs_client: Any) -> None:
-        self.hdfs_client = hdfs_client
+    def __init__(self, sink: Any) -> None:
+        # Plain WebHDFS clients are still accepted and wrapped in the matching sink.
+        self.sink: Sink = sink if isinstance(sink, Sink) else WebHdfsSink(sink)
 
     def extract(self) -> None:
         pass
 
+    @staticmethod
+    def dataframe_to_parquet(df: Union[pd.DataFrame, pa.Table]) -> bytes:
+        # Arrow tables (arrow engine) are written as is, without a round trip through pandas.
+        table: pa.Table = df if isinstance(df, pa.Table) else pa.Table.from_pandas(df)
+        buffer: BytesIO = BytesIO()
+        pq.write_table(table, buffer)
+        return buffer.getvalue()
+
+    def read_parquet(self, file_path: str) -> pa.Table:
+        return pq.read_table(BytesIO(self.sink.read(file_path)))
+
     def load_from_dataframe_as_parquet(
         self,
-        df: pd.DataFrame,
+        df: Union[pd.DataFrame, pa.Table],
         file_path: str,
         overwrite: bool = True
     ) -> None:
-        table: pa.Table = pa.Table.from_pandas(df)
-        buffer: BytesIO = BytesIO()
-        pq.write_table(table, buffer)
-        buffer.seek(0)
-        with self.hdfs_client.write(file_path, overwrite=overwrite) as f:
-            f.write(buffer.read())
+        self.sink.write(file_path, self.dataframe_to_parquet(df), overwrite=overwrite)
+
+    def load_dataframes_as_parquet(
+        self,
+        dataframes: Dict[str, Union[pd.DataFrame, pa.Table]],
+        overwrite: bool = True,
+        section: Optional[Callable[[str], ContextManager[Any]]] = None
+    ) -> Dict[str, Optional[Exception]]:
+        """
+        Serializes and uploads several dataframes concurrently.
+
+        :param dataframes: Dictionary of destination paths and dataframes.
+        :param section: Optional factory of a context manager wrapping the work of one path, run on the upload
+                        thread itself (e.g. a profiler section).
+        :return: Dictionary of destination paths and the error raised for them (None on success).
+        """
+        def load(file_path: str) -> Optional[Exception]:
+            try:
+                with section(file_path) if section is not None else nullcontext():
+                    self.load_from_dataframe_as_parquet(dataframes[file_path], file_path, overwrite)
+                return None
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.sink.max_workers) as executor:
+            return dict(zip(dataframes, executor.map(load, dataframes)))
 
 
 class DatalakeEl:
-    def __init__(self, credentials: Union[None, dict] = None):
+    ENGINES = ('pandas', 'arrow')
+
+    def __init__(self, credentials: Union[None, dict] = None, engine: str = 'pandas',
+                 parallel_workers: int = 0, parallel_min_bytes: int = 256 * 1024 * 1024,
+                 json_batch_size: int = 10000, parallel_scratch_dir: Optional[str] = None):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unsupported engine: {engine}")
         self.credentials = credentials
+        self.engine = engine
+        # Delimited files of at least parallel_min_bytes are parsed on several processes (0 workers = all cores).
+        self.parallel_workers = parallel_workers
+        self.parallel_min_bytes = parallel_min_bytes
+        self.parallel_scratch_dir = parallel_scratch_dir
+        # JSON and NDJSON files are parsed incrementally into Arrow batches of this many records.
+        self.json_batch_size = json_batch_size
+
+    def use_parallel_reader(self, file_path: str) -> bool:
+        return self.parallel_workers != 1 and os.path.getsize(file_path) >= self.parallel_min_bytes
+
+    def extract_in_parallel(self, file_path: str, delimiter: str) -> pa.Table:
+        from data_handlers.parallel_reader import ParallelDelimitedReader
+        return ParallelDelimitedReader(workers=self.parallel_workers or None,
+                                       scratch_dir=self.parallel_scratch_dir).read(file_path, delimiter)
 
     def open_file(self, reader_function: Callable[[Any], Any], file_path: str, mode: str = 'r', **kwargs) -> Any:
         with open(file_path, mode=mode, encoding='utf-8') as file:
@@ -42,6 +104,8 @@ class DatalakeEl:
             data = list(reader)
             return pd.DataFrame(data[1:], columns=data[0], **kwargs) if as_dataframe else data
 
+        if as_dataframe and not kwargs and self.use_parallel_reader(file_path):
+            return self.extract_in_parallel(file_path, delimiter).to_pandas()
         return self.open_file(file_reader, file_path, mode, delimiter=delimiter, **kwargs)
 
     def extract_from_csv(self, file_path: str, mode: str = 'r', as_dataframe: bool = True, delimiter: str = ',', **kwargs) -> Union[list, pd.DataFrame]:
@@ -55,14 +119,62 @@ class DatalakeEl:
         def json_reader(file, **kwargs):
             return json.load(file)
 
+        if as_dataframe and not kwargs:
+            return self.extract_from_json_as_arrow(file_path).to_pandas()
+        if json_stream.sniff_json_format(file_path) == json_stream.NDJSON:
+            return self.extract_from_ndjson(file_path, mode, as_dataframe, **kwargs)
         data = self.open_file(json_reader, file_path, mode, **kwargs)
         return pd.DataFrame(data, **kwargs) if as_dataframe else data
 
-    def extract_from_datalake(self, file_path: str, as_dataframe: bool = True, **kwargs) -> Union[list, dict, pd.DataFrame]:
+    def extract_from_ndjson(self, file_path: str, mode: str = 'r', as_dataframe: bool = True, **kwargs) -> Union[list, pd.DataFrame]:
+        if as_dataframe and not kwargs:
+            return self.extract_from_json_as_arrow(file_path, json_stream.NDJSON).to_pandas()
+        data = self.open_file(lambda file: list(json_stream.iter_ndjson(file)), file_path, mode)
+        return pd.DataFrame(data, **kwargs) if as_dataframe else data
+
+    # --- Arrow engine ---
+
+    def extract_delimited_as_arrow(self, file_path: str, delimiter: str) -> pa.Table:
+        """Reads a delimited file straight into an Arrow table, keeping every column as a string like the csv path."""
+        if self.use_parallel_reader(file_path):
+            return self.extract_in_parallel(file_path, delimiter)
+        with open(file_path, mode='r', encoding='utf-8', newline='') as file:
+            header = next(csv.reader(file, delimiter=delimiter), [])
+        return pa_csv.read_csv(
+            file_path,
+            parse_options=pa_csv.ParseOptions(delimiter=delimiter, newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={column: pa.string() for column in header},
+                strings_can_be_null=False,
+                quoted_strings_can_be_null=False,
+            ),
+        )
+
+    def extract_from_json_as_arrow(self, file_path: str, file_format: Optional[str] = None) -> pa.Table:
+        """Streams a JSON array or NDJSON file (sniffed when no format is given) into an Arrow table."""
+        return json_stream.read_json_table(file_path, self.json_batch_size, file_format)
+
+    def extract_as_arrow(self, file_path: str, **kwargs) -> pa.Table:
+        if file_path.endswith(".csv"):
+            return self.extract_delimited_as_arrow(file_path, kwargs.get("delimiter", ","))
+        elif file_path.endswith(".json"):
+            return self.extract_from_json_as_arrow(file_path)
+        elif file_path.endswith(NDJSON_EXTENSIONS):
+            return self.extract_from_json_as_arrow(file_path, json_stream.NDJSON)
+        elif file_path.endswith(".txt"):
+            return self.extract_delimited_as_arrow(file_path, kwargs.get("delimiter", "|"))
+        else:
+            raise ValueError(f"Unsupported file type: {file_path}")
+
+    def extract_from_datalake(self, file_path: str, as_dataframe: bool = True, **kwargs) -> Union[list, dict, pd.DataFrame, pa.Table]:
+        if self.engine == 'arrow' and as_dataframe:
+            return self.extract_as_arrow(file_path, **kwargs)
         if file_path.endswith(".csv"):
             return self.extract_from_csv(file_path, as_dataframe=as_dataframe, **kwargs)
         elif file_path.endswith(".json"):
             return self.extract_from_json(file_path, as_dataframe=as_dataframe, **kwargs)
+        elif file_path.endswith(NDJSON_EXTENSIONS):
+            return self.extract_from_ndjson(file_path, as_dataframe=as_dataframe, **kwargs)
         elif file_path.endswith(".txt"):
             return self.extract_from_txt(file_path, as_dataframe=as_dataframe, **kwargs)
         else:
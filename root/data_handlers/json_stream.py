@@ -0,0 +1,194 @@
+import re
+import json
+import logging
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+ARRAY = 'array'
+NDJSON = 'ndjson'
+_WHITESPACE = ' \t\r\n'
+_LEADING = re.compile(r'[ \t\r\n\ufeff]*')
+_BLANK = re.compile(r'[ \t\r\n]*')
+_COMMA = re.compile(r'[ \t\r\n]*,')
+# Characters that may continue a number; a number followed only by these may be cut at the buffer edge.
+_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+
+
+def sniff_json_format(file_path: str) -> str:
+    """Tells a top level JSON array apart from newline delimited JSON by its first significant character."""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        while True:
+            chunk = file.read(4096)
+            if not chunk:
+                return NDJSON
+            stripped = chunk.lstrip(_WHITESPACE + '\ufeff')
+            if stripped:
+                return ARRAY if stripped[0] == '[' else NDJSON
+
+
+def iter_json_array(file: TextIO, read_size: int = 1024 * 1024) -> Iterator[Any]:
+    """
+    Yields the elements of a top level JSON array one by one.
+
+    Only the current element and one read buffer are held in memory, whatever the size of the file.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, position, eof
+        chunk = file.read(read_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+
+    def next_char(blank: re.Pattern) -> Optional[str]:
+        """Skips whitespace and returns the next significant character, or None at the end of the file."""
+        nonlocal position
+        while True:
+            position = blank.match(buffer, position).end()
+            if position < len(buffer) or not fill():
+                break
+        return buffer[position] if position < len(buffer) else None
+
+    if next_char(_LEADING) != '[':
+        raise ValueError("Expected a top level JSON array")
+    position += 1
+
+    # Elements must be separated by exactly one comma, as json.load requires.
+    count = 0
+    expect_element = True
+    while True:
+        position = _BLANK.match(buffer, position).end()
+        char = buffer[position] if position < len(buffer) else next_char(_BLANK)
+        if char is None:
+            raise ValueError("Unexpected end of file inside the JSON array")
+        if char == ']':
+            if expect_element and count:
+                raise ValueError(f"Trailing comma after element {count} of the JSON array")
+            position += 1
+            break
+        if not expect_element:
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' after element {count} of the JSON array, got {char!r}")
+            position += 1
+            expect_element = True
+            continue
+
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof or not fill():
+                raise
+            continue
+        if (not eof and isinstance(element, (int, float)) and _NUMBER_TAIL.fullmatch(buffer, end)
+                and fill()):
+            # A number cut at the buffer edge (e.g. "1" of "1e5") decodes to a shorter value; decode it again
+            # with more data.
+            continue
+        count += 1
+        # Fast path: consume the separator right away when it is already in the buffer.
+        separator = _COMMA.match(buffer, end)
+        position = separator.end() if separator else end
+        expect_element = separator is not None
+        yield element
+
+    if next_char(_BLANK) is not None:
+        raise ValueError("Unexpected data after the end of the JSON array")
+
+
+def iter_ndjson(file: TextIO) -> Iterator[Any]:
+    """Yields one record per non empty line of a newline delimited JSON file."""
+    for line_number, line in enumerate(file, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+
+
+def _to_array(values: List[Any]) -> pa.Array:
+    """Converts the values of one column to Arrow, falling back to strings when their types are mixed."""
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # e.g. 10 in one record and "12.5" in another: keep the text and let the schema cast decide, like pandas.
+        return pa.array([value if value is None or isinstance(value, str) else json.dumps(value)
+                         for value in values], pa.string())
+
+
+def _concat(tables: List[pa.Table]) -> pa.Table:
+    """Concatenates batch tables, turning the columns whose types differ between batches into strings."""
+    try:
+        return pa.concat_tables(tables, promote_options='permissive')
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    types: Dict[str, set] = {}
+    for table in tables:
+        for field in table.schema:
+            if not pa.types.is_null(field.type):
+                types.setdefault(field.name, set()).add(field.type)
+    mixed = {name for name, column_types in types.items() if len(column_types) > 1}
+    unified = []
+    for table in tables:
+        for name in mixed & set(table.column_names):
+            index = table.schema.get_field_index(name)
+            table = table.set_column(index, pa.field(name, pa.string()), _to_string(table.column(index)))
+        unified.append(table)
+    return pa.concat_tables(unified, promote_options='permissive')
+
+
+def _to_string(column: pa.ChunkedArray) -> pa.Array:
+    try:
+        return column.cast(pa.string())
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return pa.array([value if value is None or isinstance(value, str) else json.dumps(value)
+                         for value in column.to_pylist()], pa.string())
+
+
+def iter_record_batches(file_path: str, batch_size: int = 10000, file_format: Optional[str] = None) -> Iterator[pa.RecordBatch]:
+    """
+    Streams the records of a JSON array or NDJSON file as Arrow record batches of `batch_size` rows.
+
+    Records are moved into typed columns batch by batch, so the Python objects of at most one batch are alive
+    at any time. A column whose values have mixed types (e.g. 10 and "12.5") is kept as strings.
+    """
+    file_format = file_format or sniff_json_format(file_path)
+    with open(file_path, 'r', encoding='utf-8') as file:
+        records = iter_json_array(file) if file_format == ARRAY else iter_ndjson(file)
+        columns: Dict[str, List[Any]] = {}
+        rows = 0
+        for record in records:
+            if not isinstance(record, dict):
+                raise ValueError(f"Expected JSON objects in {file_path}, got {type(record).__name__}")
+            for key in record:
+                if key not in columns:
+                    columns[key] = [None] * rows
+            for key, values in columns.items():
+                values.append(record.get(key))
+            rows += 1
+            if rows == batch_size:
+                yield pa.RecordBatch.from_arrays([_to_array(values) for values in columns.values()], list(columns))
+                columns = {key: [] for key in columns}
+                rows = 0
+        if rows:
+            yield pa.RecordBatch.from_arrays([_to_array(values) for values in columns.values()], list(columns))
+
+
+def read_json_table(file_path: str, batch_size: int = 10000, file_format: Optional[str] = None) -> pa.Table:
+    """Reads a JSON array or NDJSON file into an Arrow table through bounded record batches."""
+    tables = [pa.Table.from_batches([batch]) for batch in iter_record_batches(file_path, batch_size, file_format)]
+    if not tables:
+        return pa.table({})
+    # Batches may infer different types (e.g. int then double); promote them to a common schema.
+    table = _concat(tables)
+    logger.info("Streamed %d records from %s in %d batches", table.num_rows, file_path, len(tables))
+    return table
@@ -0,0 +1,177 @@
+import os
+import csv
+import errno
+import mmap
+import uuid
+import logging
+import tempfile
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.ipc as pa_ipc
+
+logger = logging.getLogger(__name__)
+
+QUOTE = b'"'
+NEWLINE = b'\n'
+
+# The reader runs inside a threaded pipeline (logging listener, uploads, heartbeats); forking such a process
+# can deadlock the children on locks held by other threads, so workers are started from a clean process.
+_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+
+
+def _count_quotes(file_path: str, start: int, end: int) -> int:
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return mm[start:end].count(QUOTE)
+
+
+def _write_ipc(table: pa.Table, out_dir: str) -> str:
+    out_path = os.path.join(out_dir, f"etl_range_{os.getpid()}_{uuid.uuid4().hex}.arrow")
+    try:
+        with pa.OSFile(out_path, 'wb') as sink, pa_ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    except BaseException:
+        if os.path.exists(out_path):
+            os.remove(out_path)
+        raise
+    return out_path
+
+
+def _parse_range(file_path: str, start: int, end: int, columns: List[str], delimiter: str, out_dir: str) -> str:
+    """
+    Parses one byte range into an Arrow table and stores it as an IPC file the parent can memory-map.
+
+    When `out_dir` is full (e.g. a small tmpfs), the file is written to the system temporary directory instead.
+    """
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = pa.py_buffer(mm[start:end])
+    table = pa_csv.read_csv(
+        pa.BufferReader(data),
+        read_options=pa_csv.ReadOptions(column_names=columns, use_threads=False),
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter, newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={column: pa.string() for column in columns},
+            strings_can_be_null=False,
+            quoted_strings_can_be_null=False,
+        ),
+    )
+    try:
+        return _write_ipc(table, out_dir)
+    except OSError as e:
+        fallback_dir = tempfile.gettempdir()
+        if e.errno != errno.ENOSPC or os.path.abspath(out_dir) == os.path.abspath(fallback_dir):
+            raise
+        return _write_ipc(table, fallback_dir)
+
+
+class ParallelDelimitedReader:
+    """
+    Parses large delimited files (CSV, pipe separated TXT) on several cores.
+
+    The file is memory-mapped and cut into byte ranges that end on record boundaries. A newline is only
+    a record boundary when the number of quotes before it is even, so quoted fields containing newlines
+    (and escaped "" quotes) are never split. Each range is parsed in a worker process into an Arrow IPC
+    file; the parent memory-maps those files and concatenates the tables without copying the data.
+    One process pool serves both the split and the parse of a file.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_bytes: int = 64 * 1024 * 1024,
+                 scratch_dir: Optional[str] = None) -> None:
+        """
+        :param scratch_dir: Directory for the per-range IPC files, defaults to the system temporary directory.
+                            A RAM backed directory (/dev/shm) avoids disk I/O but must fit the whole parsed file.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_bytes = chunk_bytes
+        self.scratch_dir = scratch_dir or tempfile.gettempdir()
+
+    @staticmethod
+    def read_header(file_path: str, delimiter: str) -> Tuple[List[str], int]:
+        """Returns the column names and the byte offset where the first record starts."""
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = ParallelDelimitedReader._next_boundary(mm, 0, 0)
+            header_line = mm[:end].decode('utf-8-sig')
+        header = next(csv.reader([header_line], delimiter=delimiter), [])
+        return header, end
+
+    @staticmethod
+    def _next_boundary(mm: mmap.mmap, position: int, quotes_before: int) -> int:
+        """First offset >= position that starts a new record, given the number of quotes before position."""
+        size = len(mm)
+        while position < size:
+            newline = mm.find(NEWLINE, position)
+            if newline == -1:
+                return size
+            quotes_before += mm[position:newline].count(QUOTE)
+            position = newline + 1
+            if quotes_before % 2 == 0:
+                return position
+        return size
+
+    def split(self, file_path: str, data_start: int, executor: Executor) -> List[Tuple[int, int]]:
+        """Splits the data part of the file into byte ranges aligned on record boundaries."""
+        size = os.path.getsize(file_path)
+        if size <= data_start:
+            return []
+        count = max(self.workers, -(-(size - data_start) // self.chunk_bytes))
+        step = -(-(size - data_start) // count)
+        raw_starts = list(range(data_start, size, step))
+        raw_ends = raw_starts[1:] + [size]
+
+        # Quote counts per raw chunk give the quote parity at every raw split point.
+        quote_counts = list(executor.map(_count_quotes, [file_path] * len(raw_starts), raw_starts, raw_ends))
+
+        boundaries = [data_start]
+        quotes_before = 0
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for raw_start, quotes in zip(raw_starts[1:], quote_counts[:-1]):
+                quotes_before += quotes
+                if raw_start < boundaries[-1]:
+                    # A previous boundary already moved past this split point (very long quoted field).
+                    continue
+                boundary = self._next_boundary(mm, raw_start, quotes_before)
+                if boundary < size and boundary > boundaries[-1]:
+                    boundaries.append(boundary)
+        boundaries.append(size)
+        return list(zip(boundaries[:-1], boundaries[1:]))
+
+    def read(self, file_path: str, delimiter: str = ',') -> pa.Table:
+        columns, data_start = self.read_header(file_path, delimiter)
+        out_dir = self.scratch_dir
+        futures = []
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers,
+                                     mp_context=multiprocessing.get_context(_START_METHOD)) as executor:
+                ranges = self.split(file_path, data_start, executor)
+                if not ranges:
+                    return pa.table({column: pa.array([], pa.string()) for column in columns})
+                futures = [
+                    executor.submit(_parse_range, file_path, start, end, columns, delimiter, out_dir)
+                    for start, end in ranges
+                ]
+                try:
+                    parts = [future.result() for future in futures]
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    raise
+
+            tables = []
+            for part in parts:
+                # The mapping stays valid after unlinking, so the scratch files never outlive this call.
+                tables.append(pa_ipc.open_file(pa.memory_map(part, 'r')).read_all())
+                os.remove(part)
+        finally:
+            # After a failure, drop the results of the ranges that did parse (the pool has finished by now).
+            for future in futures:
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    part = future.result()
+                    if os.path.exists(part):
+                        os.remove(part)
+        logger.info("Parsed %s in %d byte ranges with %d workers", file_path, len(ranges), self.workers)
+        return pa.concat_tables(tables)
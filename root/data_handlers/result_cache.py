@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Streams the file through BLAKE2b and returns the hex digest."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed cache of processed input files.
+
+    Maps (table, content hash) of an input file to the Parquet output written for it, so a file that is
+    dropped again (same content, new hour or re-transfer) can be skipped or have its previous output copied.
+    Entries are evicted least recently used first once `max_entries` is reached, and expire after `ttl`
+    seconds. The index is a small JSON file rewritten atomically on every change.
+    """
+
+    def __init__(self, index_path: str, max_entries: int = 10000, ttl: float = 7 * 24 * 3600) -> None:
+        self.index_path = index_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+        self.hash_seconds = 0.0
+        self._load()
+
+    @staticmethod
+    def key(table_name: str, digest: str) -> str:
+        return f"{table_name}:{digest}"
+
+    def _load(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable result cache index %s: %s", self.index_path, e)
+            return
+        for key, entry in sorted(entries.items(), key=lambda item: item[1].get('last_used', 0)):
+            self._entries[key] = entry
+        self._evict(time.time())
+
+    def _save(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.index_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.result_cache', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _evict(self, now: float) -> None:
+        expired = [key for key, entry in self._entries.items() if now - entry['created'] > self.ttl]
+        for key in expired:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def hash(self, file_path: str) -> str:
+        start = time.perf_counter()
+        digest = hash_file(file_path)
+        with self._lock:
+            self.hash_seconds += time.perf_counter() - start
+        return digest
+
+    def get(self, table_name: str, digest: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cache entry of an input file, or None.
+
+        The lookup is not counted: call hit() once the entry proved usable, or miss() when the file is processed.
+        """
+        key = self.key(table_name, digest)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry['created'] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                return None
+            entry['last_used'] = now
+            self._entries.move_to_end(key)
+            return dict(entry)
+
+    def hit(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.hits += 1
+            self.seconds_saved += entry['seconds']
+
+    def miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def put(self, table_name: str, digest: str, output_path: str, seconds: float) -> None:
+        """Remembers where the output of an input file was written and how long it took to produce."""
+        now = time.time()
+        with self._lock:
+            self._entries[self.key(table_name, digest)] = {
+                'output': output_path,
+                'seconds': seconds,
+                'created': now,
+                'last_used': now,
+            }
+            self._entries.move_to_end(self.key(table_name, digest))
+            self._evict(now)
+            self._save()
+
+    def invalidate(self, table_name: str, digest: str) -> None:
+        with self._lock:
+            if self._entries.pop(self.key(table_name, digest), None) is not None:
+                self._save()
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hit_rate(), 3),
+                'seconds_saved': round(self.seconds_saved, 3),
+                'hash_seconds': round(self.hash_seconds, 3),
+            }
@@ -0,0 +1,209 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SinkStats:
+    """Thread-safe counters of what a sink has written and how long it took."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.files: int = 0
+        self.bytes: int = 0
+        self.failures: int = 0
+        self.busy_seconds: float = 0.0
+
+    def record(self, size: int, seconds: float, failed: bool = False) -> None:
+        with self._lock:
+            if failed:
+                self.failures += 1
+            else:
+                self.files += 1
+                self.bytes += size
+            self.busy_seconds += seconds
+
+    def throughput_mb_s(self, wall_seconds: Optional[float] = None) -> float:
+        """Megabytes per second over the given wall time (defaults to the summed write time)."""
+        seconds = wall_seconds if wall_seconds is not None else self.busy_seconds
+        return self.bytes / (1024 * 1024) / seconds if seconds > 0 else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'files': self.files,
+                'bytes': self.bytes,
+                'failures': self.failures,
+                'busy_seconds': round(self.busy_seconds, 4),
+                'throughput_mb_s': round(self.throughput_mb_s(), 2),
+            }
+
+
+class Sink(ABC):
+    """Destination for the pipeline output files."""
+
+    name: str = 'sink'
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self.max_workers = max_workers
+        self.stats = SinkStats()
+
+    @abstractmethod
+    def _write(self, path: str, data: bytes, overwrite: bool) -> None:
+        """Writes a single file. Implemented by every backend."""
+
+    @abstractmethod
+    def read(self, path: str) -> bytes:
+        """Returns the content of a file previously written to the sink."""
+
+    @abstractmethod
+    def exists(self, path: str) -> bool:
+        """Checks whether a file exists in the sink."""
+
+    def write(self, path: str, data: bytes, overwrite: bool = True) -> None:
+        start = time.perf_counter()
+        try:
+            self._write(path, data, overwrite)
+        except Exception:
+            self.stats.record(len(data), time.perf_counter() - start, failed=True)
+            raise
+        self.stats.record(len(data), time.perf_counter() - start)
+
+    def write_many(self, files: Dict[str, bytes], overwrite: bool = True) -> Dict[str, Optional[Exception]]:
+        """
+        Uploads several files concurrently.
+
+        :param files: Dictionary of destination paths and file contents.
+        :return: Dictionary of destination paths and the error raised for them (None on success).
+        """
+        def upload(path: str) -> Optional[Exception]:
+            try:
+                self.write(path, files[path], overwrite)
+                return None
+            except Exception as e:
+                return e
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = dict(zip(files, executor.map(upload, files)))
+        wall_seconds = time.perf_counter() - start
+
+        total_bytes = sum(len(files[path]) for path, error in results.items() if error is None)
+        logger.info("%s sink uploaded %d files (%d bytes) in %.3fs - %.2f MB/s",
+                    self.name, len(files), total_bytes, wall_seconds,
+                    total_bytes / (1024 * 1024) / wall_seconds if wall_seconds > 0 else 0.0)
+        return results
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> 'Sink':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        self.close()
+        return False
+
+
+class WebHdfsSink(Sink):
+    """Writes files to HDFS through a WebHDFS client (e.g. hdfs.InsecureClient)."""
+
+    name = 'webhdfs'
+
+    def __init__(self, hdfs_client: Any, max_workers: int = 4) -> None:
+        super().__init__(max_workers)
+        self.hdfs_client = hdfs_client
+
+    def _write(self, path: str, data: bytes, overwrite: bool) -> None:
+        self.hdfs_client.write(path, data=data, overwrite=overwrite)
+
+    def read(self, path: str) -> bytes:
+        with self.hdfs_client.read(path) as reader:
+            return reader.read()
+
+    def exists(self, path: str) -> bool:
+        return self.hdfs_client.status(path, strict=False) is not None
+
+
+class LocalFsSink(Sink):
+    """Writes files under a local (or NFS mounted) root directory, mirroring the HDFS paths."""
+
+    name = 'local'
+
+    def __init__(self, root_dir: str, max_workers: int = 4) -> None:
+        super().__init__(max_workers)
+        self.root_dir = os.path.abspath(root_dir)
+
+    def local_path(self, path: str) -> str:
+        return os.path.join(self.root_dir, path.lstrip('/'))
+
+    def _write(self, path: str, data: bytes, overwrite: bool) -> None:
+        target = self.local_path(path)
+        if not overwrite and os.path.exists(target):
+            raise FileExistsError(f"File already exists: {target}")
+        directory = os.path.dirname(target)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file first so readers never see a partial file. Creating it with mode 0666 lets
+        # the kernel apply the process umask, so the output gets the usual permissions.
+        tmp_path = os.path.join(directory, f".{os.path.basename(target)}.{uuid.uuid4().hex}.tmp")
+        fd = os.open(tmp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, target)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def read(self, path: str) -> bytes:
+        with open(self.local_path(path), 'rb') as f:
+            return f.read()
+
+    def exists(self, path: str) -> bool:
+        return os.path.isfile(self.local_path(path))
+
+
+class LocalWebHdfsSink(WebHdfsSink):
+    """WebHDFS sink backed by an in-process WebHDFS-compatible server, for offline runs and load tests."""
+
+    name = 'local_webhdfs'
+
+    def __init__(self, root_dir: str, max_workers: int = 4) -> None:
+        from hdfs import InsecureClient
+        from data_handlers.webhdfs_server import LocalWebHdfsServer
+
+        self.server = LocalWebHdfsServer(root_dir)
+        self.server.start()
+        super().__init__(InsecureClient(self.server.url), max_workers)
+
+    def close(self) -> None:
+        self.server.stop()
+
+
+def build_sink(kind: str, hdfs_client: Any = None, root_dir: Optional[str] = None, max_workers: int = 4) -> Sink:
+    """
+    Creates a sink by name.
+
+    :param kind: One of 'webhdfs', 'local' or 'local_webhdfs'.
+    :param hdfs_client: WebHDFS client, required for 'webhdfs'.
+    :param root_dir: Root directory, required for 'local' and 'local_webhdfs'.
+    :param max_workers: Number of concurrent uploads.
+    """
+    if kind == 'webhdfs':
+        if hdfs_client is None:
+            raise ValueError("The 'webhdfs' sink requires an hdfs client.")
+        return WebHdfsSink(hdfs_client, max_workers)
+    if kind in ('local', 'local_webhdfs'):
+        if not root_dir:
+            raise ValueError(f"The '{kind}' sink requires a root directory.")
+        sink_cls = LocalFsSink if kind == 'local' else LocalWebHdfsSink
+        return sink_cls(root_dir, max_workers)
+    raise ValueError(f"Unsupported sink type: {kind}")
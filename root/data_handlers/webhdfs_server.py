@@ -0,0 +1,238 @@
+import os
+import json
+import shutil
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse, parse_qs, quote
+
+logger = logging.getLogger(__name__)
+
+WEBHDFS_PREFIX = '/webhdfs/v1'
+
+
+class _WebHdfsHandler(BaseHTTPRequestHandler):
+    """Implements the subset of the WebHDFS REST API used by the pipeline."""
+
+    protocol_version = 'HTTP/1.1'
+    server: 'ThreadingHTTPServer'
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("webhdfs %s - " + format, self.address_string(), *args)
+
+    # --- Helpers ---
+
+    def _parse(self):
+        url = urlparse(self.path)
+        if not url.path.startswith(WEBHDFS_PREFIX):
+            return None, None, {}
+        hdfs_path = url.path[len(WEBHDFS_PREFIX):] or '/'
+        params = {key.lower(): values[-1] for key, values in parse_qs(url.query).items()}
+        return hdfs_path, params.get('op', '').upper(), params
+
+    def _local_path(self, hdfs_path: str) -> str:
+        root = self.server.root_dir
+        local = os.path.abspath(os.path.join(root, hdfs_path.lstrip('/')))
+        if local != root and not local.startswith(root + os.sep):
+            raise PermissionError(f"Path escapes the server root: {hdfs_path}")
+        return local
+
+    def _read_body(self) -> bytes:
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b''.join(chunks)
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send(self, status: int, body: bytes = b'', content_type: str = 'application/json',
+              headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        self._send(status, json.dumps(payload).encode('utf-8'))
+
+    def _send_error(self, status: int, exception: str, message: str) -> None:
+        self._send_json(status, {'RemoteException': {
+            'exception': exception,
+            'javaClassName': f'java.io.{exception}',
+            'message': message,
+        }})
+
+    @staticmethod
+    def _file_status(local_path: str, name: str = '') -> Dict[str, Any]:
+        stat = os.stat(local_path)
+        is_dir = os.path.isdir(local_path)
+        return {
+            'pathSuffix': name,
+            'type': 'DIRECTORY' if is_dir else 'FILE',
+            'length': 0 if is_dir else stat.st_size,
+            'modificationTime': int(stat.st_mtime * 1000),
+            'accessTime': int(stat.st_atime * 1000),
+            'blockSize': 134217728,
+            'replication': 0 if is_dir else 1,
+            'owner': 'etl',
+            'group': 'supergroup',
+            'permission': '755' if is_dir else '644',
+        }
+
+    def _dispatch(self, method: str) -> None:
+        hdfs_path, op, params = self._parse()
+        if hdfs_path is None:
+            self._send_error(404, 'FileNotFoundException', f"Unknown endpoint: {self.path}")
+            return
+        handler = getattr(self, f'_op_{method}_{op.lower()}', None)
+        if handler is None:
+            self._read_body()
+            self._send_error(400, 'UnsupportedOperationException', f"Unsupported operation: {method} {op}")
+            return
+        try:
+            handler(hdfs_path, self._local_path(hdfs_path), params)
+        except FileNotFoundError as e:
+            self._send_error(404, 'FileNotFoundException', str(e))
+        except FileExistsError as e:
+            self._send_error(403, 'FileAlreadyExistsException', str(e))
+        except PermissionError as e:
+            self._send_error(403, 'AccessControlException', str(e))
+        except Exception as e:
+            # Anything else (a directory in the way, a full disk, a bad parameter) must still answer the client,
+            # otherwise it waits on a dropped connection instead of seeing the error.
+            logger.exception("webhdfs %s %s %s failed", method.upper(), op, hdfs_path)
+            self._send_error(500, 'IOException', f"{type(e).__name__}: {e}")
+
+    def do_GET(self) -> None:
+        self._dispatch('get')
+
+    def do_PUT(self) -> None:
+        self._dispatch('put')
+
+    def do_DELETE(self) -> None:
+        self._dispatch('delete')
+
+    # --- Operations ---
+
+    def _op_put_create(self, hdfs_path: str, local_path: str, params: Dict[str, str]) -> None:
+        overwrite = params.get('overwrite', 'false').lower() == 'true'
+        if 'datanode' not in params:
+            # Name node step: redirect the client to the "data node" (this same server).
+            self._read_body()
+            if not overwrite and os.path.exists(local_path):
+                raise FileExistsError(f"{hdfs_path} already exists")
+            location = f"{self.server.url}{WEBHDFS_PREFIX}{quote(hdfs_path)}?op=CREATE&datanode=true" \
+                       f"&overwrite={str(overwrite).lower()}"
+            self._send(307, headers={'Location': location})
+            return
+
+        data = self._read_body()
+        if not overwrite and os.path.exists(local_path):
+            raise FileExistsError(f"{hdfs_path} already exists")
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        tmp_path = f"{local_path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, local_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._send(201, headers={'Location': f"hdfs://{hdfs_path}"})
+
+    def _op_put_mkdirs(self, hdfs_path: str, local_path: str, params: Dict[str, str]) -> None:
+        self._read_body()
+        os.makedirs(local_path, exist_ok=True)
+        self._send_json(200, {'boolean': True})
+
+    def _op_get_open(self, hdfs_path: str, local_path: str, params: Dict[str, str]) -> None:
+        if not os.path.isfile(local_path):
+            raise FileNotFoundError(f"File does not exist: {hdfs_path}")
+        with open(local_path, 'rb') as f:
+            f.seek(int(params.get('offset', 0)))
+            length = params.get('length')
+            data = f.read(int(length)) if length else f.read()
+        self._send(200, data, content_type='application/octet-stream')
+
+    def _op_get_getfilestatus(self, hdfs_path: str, local_path: str, params: Dict[str, str]) -> None:
+        if not os.path.exists(local_path):
+            raise FileNotFoundError(f"File does not exist: {hdfs_path}")
+        self._send_json(200, {'FileStatus': self._file_status(local_path)})
+
+    def _op_get_liststatus(self, hdfs_path: str, local_path: str, params: Dict[str, str]) -> None:
+        if not os.path.exists(local_path):
+            raise FileNotFoundError(f"File does not exist: {hdfs_path}")
+        if os.path.isdir(local_path):
+            statuses = [self._file_status(os.path.join(local_path, name), name)
+                        for name in sorted(os.listdir(local_path)) if not name.endswith('.tmp')]
+        else:
+            statuses = [self._file_status(local_path)]
+        self._send_json(200, {'FileStatuses': {'FileStatus': statuses}})
+
+    def _op_delete_delete(self, hdfs_path: str, local_path: str, params: Dict[str, str]) -> None:
+        deleted = os.path.exists(local_path)
+        if os.path.isdir(local_path):
+            if params.get('recursive', 'false').lower() == 'true':
+                shutil.rmtree(local_path)
+            elif os.listdir(local_path):
+                raise PermissionError(f"{hdfs_path} is non empty")
+            else:
+                os.rmdir(local_path)
+        elif deleted:
+            os.remove(local_path)
+        self._send_json(200, {'boolean': deleted})
+
+
+class LocalWebHdfsServer:
+    """
+    Minimal WebHDFS-compatible HTTP server storing files under a local directory.
+
+    It speaks enough of the protocol (CREATE with the name node redirect, OPEN, GETFILESTATUS,
+    LISTSTATUS, MKDIRS, DELETE) for hdfs.InsecureClient, so the write path can be tested offline.
+    """
+
+    def __init__(self, root_dir: str, host: str = '127.0.0.1', port: int = 0) -> None:
+        self.root_dir = os.path.abspath(root_dir)
+        os.makedirs(self.root_dir, exist_ok=True)
+        self.httpd = ThreadingHTTPServer((host, port), _WebHdfsHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.root_dir = self.root_dir
+        self.httpd.url = self.url
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'LocalWebHdfsServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='local-webhdfs', daemon=True)
+        self._thread.start()
+        logger.info("Local WebHDFS server listening on %s (root=%s)", self.url, self.root_dir)
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.httpd.server_close()
+
+    def __enter__(self) -> 'LocalWebHdfsServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        self.stop()
+        return False
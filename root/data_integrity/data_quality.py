@@ -1,9 +1,18 @@
 from datetime import datetime
 from typing import Any
 import pandas as pd
+import pyarrow as pa
 import logging
 logger = logging.getLogger(__name__)
 
+# Arrow equivalents of the pandas dtypes used in the table schemas.
+ARROW_TYPES = {
+    'string': pa.string(),
+    'int64': pa.int64(),
+    'float64': pa.float64(),
+    'datetime64[ns]': pa.timestamp('ns'),
+}
+
 class DataQuality:
     def __init__(self, schema: dict[str, list[str]]):
         self.schema = schema
@@ -30,6 +39,8 @@ class DataQuality:
         return dataframe
 
     def apply_checks(self, dataframe: Any, table_name: str, date: str, hour: int) -> Any:
+        if isinstance(dataframe, pa.Table):
+            return self.apply_checks_arrow(dataframe, table_name, date, hour)
         self.check_columns(table_name, dataframe.columns)
         dataframe = self.enforce_schema(dataframe, table_name)
         dataframe = self.add_quality_columns(dataframe, date, hour)
@@ -44,3 +55,43 @@ class DataQuality:
                 raise ValueError(f"Failed to cast column '{column}' to {dtype}: {e}")
 
         return dataframe
+
+    # --- Arrow engine ---
+
+    def arrow_schema(self, table_name: str) -> pa.Schema:
+        return pa.schema([(column, ARROW_TYPES[dtype]) for column, dtype in self.schema[table_name].items()])
+
+    def enforce_schema_arrow(self, table: pa.Table, table_name: str) -> pa.Table:
+        for field in self.arrow_schema(table_name):
+            index = table.schema.get_field_index(field.name)
+            column = table.column(index)
+            if column.type == field.type:
+                continue
+            try:
+                table = table.set_column(index, field, column.cast(field.type))
+            except Exception as e:
+                raise ValueError(f"Failed to cast column '{field.name}' to {field.type}: {e}")
+        return table
+
+    def add_quality_columns_arrow(self, table: pa.Table, date: str, hour: int) -> pa.Table:
+        current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = table.num_rows
+        table = table.append_column('processing_time', pa.repeat(pa.scalar(current_date, pa.string()), rows))
+        table = table.append_column('partition_date', pa.repeat(pa.scalar(date, pa.string()), rows))
+        return table.append_column('partition_hour', pa.repeat(pa.scalar(hour, pa.int64()), rows))
+
+    def restamp_quality_columns_arrow(self, table: pa.Table, date: str, hour: int) -> pa.Table:
+        """Overwrites the quality columns of an already processed table, keeping their position and type."""
+        current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for name, value in (('processing_time', current_date), ('partition_date', date), ('partition_hour', hour)):
+            index = table.schema.get_field_index(name)
+            if index == -1:
+                raise ValueError(f"Missing quality column '{name}' in processed table.")
+            field = table.schema.field(index)
+            table = table.set_column(index, field, pa.repeat(pa.scalar(value), table.num_rows).cast(field.type))
+        return table
+
+    def apply_checks_arrow(self, table: pa.Table, table_name: str, date: str, hour: int) -> pa.Table:
+        self.check_columns(table_name, table.column_names)
+        table = self.enforce_schema_arrow(table, table_name)
+        return self.add_quality_columns_arrow(table, date, hour)
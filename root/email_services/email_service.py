@@ -3,10 +3,13 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from dotenv import load_dotenv
 import os
+import logging
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class EmailSender:
     def __init__(self, smtp_server = None, smtp_port = None):
         # Read credentials from environment variables
@@ -37,3 +40,8 @@ class EmailSender:
             server.send_message(msg)
 
 
+class NullEmailSender:
+    """Drop-in EmailSender that only logs, for dry runs that must not alert anybody."""
+
+    def send_email(self, recipient_email, subject, body):
+        logger.info("Email to %s not sent (dry run): %s", recipient_email, subject)
@@ -1,94 +1,292 @@
 import os
+import sys
 import json
+import argparse
 import configparser
-from concurrent.futures import ThreadPoolExecutor
+import statistics
+import subprocess
 import time
 import logging
+from contextlib import contextmanager
+from functools import cached_property
+from typing import Any, Dict, Iterator, List, Optional, Set
 
-from stream_services.stream import Stream
-from data_integrity.data_quality import DataQuality
-from transformers.transformer import Transformer
-from data_handlers.el import DatalakeEl, HdfsEL
-from email_services.email_service import EmailSender
-from db_connections.hdfs_connection import HdfsConnection
 from utilities.utils_function import setup_logger
-from pipeline import (
-    extract_all_tables,
-    apply_checks_on_all_tables,
-    apply_transformations_on_all_tables,
-    save_all_dataframes
-)
-
-# Setup logger
-setup_logger()
+
 logger = logging.getLogger(__name__)
 
-# Load configuration
-config = configparser.ConfigParser(allow_no_value=True)
-config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.join('configs','config.ini')))
-config.read(config_path)
+CONFIG_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.join('configs', 'config.ini')))
 
-main_dir = config['DataLake']['main_dir']
-start_date = config['DataLake']['date']
-start_hour = int(config['DataLake']['hour'])
-schema = json.loads(config['DataLake']['src_tables_schema'])
-hdfs_host = config['HDFS']['host']
-hdfs_port = config['HDFS']['port']
-hdfs_writing_path = config['HDFS']['writing_path']
-recipient_email = config['email_service']['recipient_email']
-smtp_server = config['email_service']['smtp_server']
-smtp_port = config['email_service']['smtp_port']
-logger.info("Configuration loaded: Main Dir=%s | Start Date=%s | Start Hour=%d", main_dir, start_date, start_hour)
+# Modules that must never be imported just to start the CLI.
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'hdfs', 'dotenv')
 
-# Initialize reusable objects
-stream_obj = Stream(main_dir, start_date, start_hour)
-data_quality_obj = DataQuality(schema)
-datalake_el_obj = DatalakeEl()
-transformer_obj = Transformer()
-email_sender_obj = EmailSender(smtp_server, smtp_port)
 
+def load_config(config_path: str = CONFIG_PATH) -> configparser.ConfigParser:
+    """Reads the ini configuration file."""
+    config = configparser.ConfigParser(allow_no_value=True)
+    config.read(config_path)
+    return config
 
 
-logger = logging.getLogger(__name__)
+def logging_options(config: configparser.ConfigParser) -> Dict[str, Any]:
+    """Reads the [Logging] section into keyword arguments for setup_logger."""
+    if not config.has_section('Logging'):
+        return {}
+    section = config['Logging']
+    return {
+        'log_file': section.get('file', 'ETL.log'),
+        'level': logging.getLevelName(section.get('level', 'INFO').upper()),
+        'json_format': section.getboolean('json', True),
+        'max_bytes': section.getint('max_bytes', 50 * 1024 * 1024),
+        'backup_count': section.getint('backup_count', 10),
+        'when': section.get('when', 'midnight'),
+        'queue_size': section.getint('queue_size', 10000),
+        'rate_limit_burst': section.getint('rate_limit_burst', 20),
+        'rate_limit_interval': section.getfloat('rate_limit_interval', 60.0),
+        'debug_sample_rate': section.getfloat('debug_sample_rate', 1.0),
+    }
+
+
+class Services:
+    """
+    Lazily built pipeline services.
+
+    Every service (and the heavy module behind it) is imported and created on first access,
+    so subcommands only pay for what they actually use.
+    """
+
+    def __init__(self, config: configparser.ConfigParser) -> None:
+        self.config = config
+        self.main_dir: str = config['DataLake']['main_dir']
+        # Optional comma separated list of source roots (branches, source systems); defaults to main_dir.
+        self.main_dirs: List[str] = [
+            path.strip() for path in config.get('DataLake', 'main_dirs', fallback='').split(',') if path.strip()
+        ] or [self.main_dir]
+        self.start_date: str = config['DataLake']['date']
+        self.start_hour: int = int(config['DataLake']['hour'])
+        self.hdfs_host: str = config['HDFS']['host']
+        self.hdfs_port: str = config['HDFS']['port']
+        self.hdfs_writing_path: str = config['HDFS']['writing_path']
+        self.recipient_email: str = config['email_service']['recipient_email']
+        self.smtp_server: str = config['email_service']['smtp_server']
+        self.smtp_port: str = config['email_service']['smtp_port']
+        self.engine: str = config.get('Pipeline', 'engine', fallback='pandas')
+        self.sink_type: str = config.get('Sink', 'type', fallback='webhdfs')
+        self.sink_root_dir: str = config.get('Sink', 'root_dir', fallback='hdfs_local')
+        self.sink_max_workers: int = config.getint('Sink', 'max_workers', fallback=4)
+
+    @cached_property
+    def profiler(self) -> Any:
+        from utilities.profiler import StageProfiler
+
+        section = self.config['Profiling'] if self.config.has_section('Profiling') else {}
+        return StageProfiler(
+            output_dir=section.get('output_dir', 'profiles'),
+            enabled=str(section.get('enabled', 'false')).lower() in ('1', 'true', 'yes', 'on'),
+            tables=[table.strip() for table in section.get('tables', '').split(',')],
+            mode=section.get('mode', 'cprofile'),
+            sample_interval=float(section.get('sample_interval_ms', 5)) / 1000,
+            top_allocations=int(section.get('top_allocations', 25)),
+        )
+
+    @cached_property
+    def result_cache(self) -> Any:
+        """Content-addressed cache of processed inputs, or None when disabled."""
+        if not self.config.getboolean('ResultCache', 'enabled', fallback=False):
+            return None
+        from data_handlers.result_cache import ResultCache
+
+        section = self.config['ResultCache']
+        return ResultCache(
+            index_path=section.get('index_path', 'result_cache.json'),
+            max_entries=section.getint('max_entries', 10000),
+            ttl=section.getfloat('ttl_hours', 168) * 3600,
+        )
+
+    @cached_property
+    def schema(self) -> Dict[str, Dict[str, str]]:
+        return json.loads(self.config['DataLake']['src_tables_schema'])
+
+    @cached_property
+    def stream(self) -> Any:
+        from stream_services.stream import Stream
+        return Stream(self.main_dirs, self.start_date, self.start_hour, self.coordinator)
+
+    @cached_property
+    def batcher(self) -> Any:
+        """AdaptiveBatcher coalescing the stream into larger batches, or None when disabled."""
+        if not self.config.getboolean('Batching', 'enabled', fallback=False):
+            return None
+        from stream_services.batching import AdaptiveBatcher
+
+        section = self.config['Batching']
+        return AdaptiveBatcher(
+            self.stream,
+            max_wait=section.getfloat('max_wait_seconds', 30),
+            min_wait=section.getfloat('min_wait_seconds', 0),
+            max_files=section.getint('max_files', 50),
+            max_bytes=section.getint('max_bytes', 1024 * 1024 * 1024),
+            gap_multiplier=section.getfloat('gap_multiplier', 2.0),
+            poll_interval=section.getfloat('poll_interval_seconds', 1.0),
+            expected_tables=self.schema.keys(),
+            initial_wait=section.getfloat('initial_wait_seconds', 2.0),
+            owns=self.coordinator.owns if self.coordinator is not None else None,
+        )
+
+    @cached_property
+    def coordinator(self) -> Any:
+        """ShardCoordinator of this worker when sharding is enabled, otherwise None."""
+        if not self.config.getboolean('Sharding', 'enabled', fallback=False):
+            return None
+        from stream_services.sharding import ShardCoordinator
+
+        section = self.config['Sharding']
+        return ShardCoordinator(
+            coordination_dir=section.get('coordination_dir'),
+            worker_id=section.get('worker_id') or None,
+            lease_seconds=section.getfloat('lease_seconds', 300),
+            heartbeat_seconds=section.getfloat('heartbeat_seconds', 10),
+            vnodes=section.getint('vnodes', 64),
+        )
+
+    @cached_property
+    def data_quality(self) -> Any:
+        from data_integrity.data_quality import DataQuality
+        return DataQuality(self.schema)
+
+    @cached_property
+    def datalake_el(self) -> Any:
+        from data_handlers.el import DatalakeEl
+        return DatalakeEl(
+            engine=self.engine,
+            parallel_workers=self.config.getint('Pipeline', 'parallel_workers', fallback=0),
+            parallel_min_bytes=self.config.getint('Pipeline', 'parallel_min_bytes', fallback=256 * 1024 * 1024),
+            json_batch_size=self.config.getint('Pipeline', 'json_batch_size', fallback=10000),
+            parallel_scratch_dir=self.config.get('Pipeline', 'parallel_scratch_dir', fallback='') or None,
+        )
+
+    @cached_property
+    def transformer(self) -> Any:
+        from transformers.transformer import Transformer
+        return Transformer()
+
+    @cached_property
+    def email_sender(self) -> Any:
+        from email_services.email_service import EmailSender
+        return EmailSender(self.smtp_server, self.smtp_port)
+
+    def warm_up(self) -> None:
+        """Builds every pipeline service up front, before they are shared between worker threads."""
+        for name in ('data_quality', 'datalake_el', 'transformer', 'email_sender', 'profiler', 'result_cache'):
+            getattr(self, name)
+
+    def source_name(self, main_dir: str) -> str:
+        return os.path.basename(os.path.normpath(main_dir)) if len(self.main_dirs) > 1 else ''
+
+    def partition_path(self, date: str, hour: int, main_dir: Optional[str] = None) -> str:
+        return os.path.join(main_dir or self.main_dir, date, str(hour).zfill(2))
+
+    def partition_sources(self, date: str, hour: int) -> Dict[str, Dict[str, str]]:
+        """Returns the files of a single date/hour partition, grouped by source."""
+        sources: Dict[str, Dict[str, str]] = {}
+        for main_dir in self.main_dirs:
+            path = self.partition_path(date, hour, main_dir)
+            if os.path.isdir(path):
+                files = {file: os.path.join(path, file) for file in sorted(os.listdir(path))}
+                if files:
+                    sources[self.source_name(main_dir)] = files
+        return sources
+
+
+def process_stream(services: Services, new_files, date, hour, hdfs_el_obj, max_retries=3, source='') -> Dict[str, bool]:
+    """
+    Process new files through the pipeline with retry logic.
+
+    :return: Whether each input file was handled: its table saved, all its rows filtered out by the checks,
+             or its content already processed (result cache). Unhandled files should be retried.
+    """
+    from pipeline import (
+        skip_cached_files,
+        extract_all_tables,
+        apply_checks_on_all_tables,
+        apply_transformations_on_all_tables,
+        save_all_dataframes
+    )
+
+    handled: Dict[str, bool] = dict.fromkeys(new_files, False)
+    result_cache = services.result_cache
 
-def process_stream(new_files, date, hour, hdfs_el_obj, max_retries=3):
-    """Process new files through the pipeline with retry logic."""
     for attempt in range(1, max_retries + 1):
         try:
-            logger.info("Processing %d new files for date=%s hour=%d", len(new_files), date, hour)
+            files = new_files
+            digests: Dict[str, str] = {}
+            if result_cache is not None:
+                files, digests = skip_cached_files(
+                    result_cache, new_files, hdfs_el_obj, services.data_quality, services.hdfs_writing_path, date,
+                    hour, services.config.get('ResultCache', 'on_hit', fallback='skip'), source
+                )
+                for file in new_files:
+                    handled[file] = file not in files
+                logger.info("Result cache: %s", result_cache.report())
+                if not files:
+                    logger.info("All files for date=%s hour=%d were already processed", date, hour)
+                    return handled
+
+            logger.info("Processing %d new files for date=%s hour=%d", len(files), date, hour)
+            started = time.perf_counter()
+            saved: Set[str] = set()
+            emptied: Set[str] = set()
+
+            def on_saved(table_name: str, output_path: str) -> None:
+                saved.add(table_name)
+                if result_cache is not None:
+                    # The batch cost is shared evenly between its files.
+                    seconds = (time.perf_counter() - started) / len(files)
+                    for file, digest in digests.items():
+                        if file.split(".")[0] == table_name:
+                            result_cache.put(table_name, digest, output_path, seconds)
 
             # Step 1: Extract
-            dataframes = extract_all_tables(datalake_el_obj, new_files)
+            dataframes = extract_all_tables(services.datalake_el, files, services.profiler)
             logger.info("Extracted data for %d tables", len(dataframes))
 
             # Step 2: Data Quality Checks
             checked_dfs = apply_checks_on_all_tables(
-                data_quality_obj,
+                services.data_quality,
                 dataframes,
                 date,
                 hour,
-                email_sender_obj,
-                recipient_email
+                services.email_sender,
+                services.recipient_email,
+                services.profiler,
+                emptied
             )
             logger.info("Data quality checks passed for %d tables", len(checked_dfs))
 
             # Step 3: Transform
-            transformed_dfs = apply_transformations_on_all_tables(transformer_obj, checked_dfs)
+            transformed_dfs = apply_transformations_on_all_tables(services.transformer, checked_dfs, services.profiler)
             logger.info("Transformations applied on %d tables", len(transformed_dfs))
 
             # Step 4: Save
-            success_count = save_all_dataframes(hdfs_el_obj, transformed_dfs, hdfs_writing_path, date, hour)
+            success_count = save_all_dataframes(hdfs_el_obj, transformed_dfs, services.hdfs_writing_path, date, hour,
+                                                services.profiler, on_saved, source)
             logger.info("Successfully saved %d out of %d transformed tables to HDFS", success_count, len(transformed_dfs))
 
-            # Success case
-            logger.info("Pipeline succeeded for %d tables", success_count)
-            return  # Exit after a successful run
+            for file in files:
+                handled[file] = file.split(".")[0] in saved or file.split(".")[0] in emptied
+            unhandled = [file for file in new_files if not handled[file]]
+            if unhandled:
+                logger.error("Pipeline left %d files unprocessed for date=%s hour=%d: %s", len(unhandled), date, hour,
+                             unhandled)
+            else:
+                logger.info("Pipeline succeeded for %d tables", success_count)
+            return handled
 
         except Exception as e:
             # Log the failure attempt and error details
             logger.error("Attempt %d: Pipeline failed - %s", attempt, str(e), exc_info=True)
-            email_sender_obj.send_email(
-                recipient_email,
+            services.email_sender.send_email(
+                services.recipient_email,
                 f"Pipeline Failure - Attempt {attempt}",
                 f"Pipeline failed on attempt {attempt}:\n\n{str(e)}"
             )
@@ -99,31 +297,419 @@ def process_stream(new_files, date, hour, hdfs_el_obj, max_retries=3):
                 time.sleep(5)
             else:
                 logger.error("Pipeline failed after %d attempts.", max_retries)
-                email_sender_obj.send_email(
-                    recipient_email,
+                services.email_sender.send_email(
+                    services.recipient_email,
                     "Pipeline Failure - Max Retries Reached",
                     f"Pipeline failed after {max_retries} attempts for date={date} hour={hour}."
                 )
+    return handled
 
-if __name__ == '__main__':
-    with HdfsConnection(hdfs_host, hdfs_port) as hdfs_client:
-        hdfs_el_obj = HdfsEL(hdfs_client)
-
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            while True:
-                try:
-                    new_files, date, hour = stream_obj.stream()
-                    if new_files:
-                        logger.info("Streamed %d new files: %s", len(new_files), new_files)
-                        executor.submit(process_stream, new_files, date, hour, hdfs_el_obj)
-                    else:
-                        logger.info("No new files found. Sleeping for 10 seconds.")
+
+@contextmanager
+def hdfs_loader(services: Services) -> Iterator[Any]:
+    """Opens the configured output sink and yields a loader bound to it."""
+    from data_handlers.el import HdfsEL
+    from data_handlers.sinks import build_sink
+
+    if services.sink_type == 'webhdfs':
+        from db_connections.hdfs_connection import HdfsConnection
+
+        with HdfsConnection(services.hdfs_host, services.hdfs_port) as hdfs_client:
+            with build_sink('webhdfs', hdfs_client=hdfs_client, max_workers=services.sink_max_workers) as sink:
+                yield HdfsEL(sink)
+    else:
+        with build_sink(services.sink_type, root_dir=services.sink_root_dir,
+                        max_workers=services.sink_max_workers) as sink:
+            logger.info("Writing output to the '%s' sink under %s", services.sink_type, services.sink_root_dir)
+            yield HdfsEL(sink)
+
+
+# --- Subcommands ---
+
+def spawn_stream_workers(args: argparse.Namespace) -> int:
+    """Runs `stream` in several local worker processes sharing the work through the shard coordinator."""
+    import socket
+
+    argv = []
+    skip_next = False
+    for arg in args.argv:
+        if skip_next:
+            skip_next = False
+        elif arg == '--processes':
+            skip_next = True
+        elif not arg.startswith('--processes='):
+            argv.append(arg)
+
+    host = socket.gethostname()
+    children = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__)] + argv + ['--worker-id', f"{host}-{i}"])
+        for i in range(args.processes)
+    ]
+    logger.info("Started %d stream worker processes", len(children))
+    try:
+        return max(child.wait() for child in children)
+    except KeyboardInterrupt:
+        for child in children:
+            child.terminate()
+        return 130
+
+
+def cmd_stream(services: Services, args: argparse.Namespace) -> int:
+    """Watches the datalake forever and processes every new batch of files."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    if args.processes > 1:
+        return spawn_stream_workers(args)
+
+    logger.info("Configuration loaded: Main Dirs=%s | Start Date=%s | Start Hour=%d",
+                services.main_dirs, services.start_date, services.start_hour)
+    services.warm_up()
+    stream_obj = services.stream
+    batcher = services.batcher
+    next_batch = batcher.next_batch if batcher is not None else stream_obj.stream_with_source
+    coordinator = services.coordinator
+    if coordinator is not None:
+        coordinator.start()
+
+    def finish(files: Dict[str, str]):
+        def done(future) -> None:
+            error = future.exception()
+            if error is not None:
+                logger.error("Processing of %s failed: %s", list(files), error)
+            handled = future.result() if error is None else dict.fromkeys(files, False)
+            stream_obj.finish(files, handled)
+        return done
+
+    try:
+        with hdfs_loader(services) as hdfs_el_obj:
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                while True:
+                    try:
+                        source, new_files, date, hour = next_batch()
+                        if new_files:
+                            logger.info("Streamed %d new files%s: %s", len(new_files),
+                                        f" from source {source}" if source else "", new_files)
+                            future = executor.submit(process_stream, services, new_files, date, hour, hdfs_el_obj,
+                                                     source=source)
+                            future.add_done_callback(finish(new_files))
+                        else:
+                            logger.info("No new files found. Sleeping for 10 seconds.")
+                            time.sleep(10)
+                    except Exception as e:
+                        logger.error("Error during streaming: %s", str(e), exc_info=True)
+                        services.email_sender.send_email(
+                            services.recipient_email,
+                            "Streaming Failure",
+                            f"Error during streaming loop:\n\n{str(e)}"
+                        )
                         time.sleep(10)
-                except Exception as e:
-                    logger.error("Error during streaming: %s", str(e), exc_info=True)
-                    email_sender_obj.send_email(
-                        recipient_email,
-                        "Streaming Failure",
-                        f"Error during streaming loop:\n\n{str(e)}"
-                    )
-                    time.sleep(10)
+    finally:
+        if batcher is not None:
+            logger.info("Micro-batching summary: %s", batcher.stats.report())
+        if coordinator is not None:
+            coordinator.stop()
+
+
+def run_partitions(services: Services, partitions: List[tuple]) -> int:
+    """Runs the full pipeline once for each (date, hour) partition and returns the number of failures."""
+    failures = 0
+    with hdfs_loader(services) as hdfs_el_obj:
+        for date, hour in partitions:
+            sources = services.partition_sources(date, hour)
+            if not sources:
+                logger.info("No files found for date=%s hour=%d. Skipping.", date, hour)
+                continue
+            for source, files in sources.items():
+                handled = process_stream(services, files, date, hour, hdfs_el_obj, max_retries=1, source=source)
+                if not all(handled.values()):
+                    failures += 1
+    return failures
+
+
+def cmd_run_partition(services: Services, args: argparse.Namespace) -> int:
+    """Processes a single date/hour partition once and exits."""
+    return 1 if run_partitions(services, [(args.date, args.hour)]) else 0
+
+
+def cmd_backfill(services: Services, args: argparse.Namespace) -> int:
+    """Processes every hourly partition between two points in time (both inclusive)."""
+    from stream_services.stream import TimeManager
+
+    time_manager = TimeManager(args.start_date, args.start_hour)
+    end = (args.end_date, args.end_hour)
+    partitions = []
+    while (time_manager.current_date, time_manager.current_hour) <= end:
+        partitions.append((time_manager.current_date, time_manager.current_hour))
+        time_manager.increment_hour()
+
+    logger.info("Backfilling %d partitions from %s %02d to %s %02d",
+                len(partitions), args.start_date, args.start_hour, args.end_date, args.end_hour)
+    failures = run_partitions(services, partitions)
+    logger.info("Backfill finished with %d failed partitions", failures)
+    return 1 if failures else 0
+
+
+def cmd_validate(services: Services, args: argparse.Namespace) -> int:
+    """Extracts and checks a partition without transforming or writing anything."""
+    from pipeline import extract_all_tables, apply_checks_on_all_tables
+
+    sources = services.partition_sources(args.date, args.hour)
+    if not sources:
+        logger.error("No files found under %s", services.partition_path(args.date, args.hour))
+        return 1
+
+    if args.notify:
+        email_sender = services.email_sender
+    else:
+        from email_services.email_service import NullEmailSender
+        email_sender = NullEmailSender()
+
+    failed = 0
+    for source, files in sources.items():
+        prefix = source + '/' if source else ''
+        dataframes = extract_all_tables(services.datalake_el, files, services.profiler)
+        emptied: Set[str] = set()
+        checked_dfs = apply_checks_on_all_tables(
+            services.data_quality,
+            dataframes,
+            args.date,
+            args.hour,
+            email_sender,
+            services.recipient_email,
+            services.profiler,
+            emptied
+        )
+        for table_name, dataframe in dataframes.items():
+            status = "OK" if table_name in checked_dfs or table_name in emptied else "FAILED"
+            print(f"{prefix}{table_name}: {dataframe.shape[0]} rows -> {status}")
+            failed += status == "FAILED"
+        # Files of known tables that could not even be extracted; other files in the partition are not tables.
+        for file in files:
+            table_name = file.split(".")[0]
+            if table_name in services.schema and table_name not in dataframes:
+                print(f"{prefix}{table_name}: extraction FAILED")
+                failed += 1
+    return 1 if failed else 0
+
+
+def cmd_show_config(services: Services, args: argparse.Namespace) -> int:
+    """Prints the effective configuration, after the command line overrides, and exits."""
+    services.config.write(sys.stdout)
+    return 0
+
+
+def startup_argv(config_path: str) -> List[str]:
+    """Cheapest real run of the CLI: parses arguments, loads the config, starts logging and builds Services."""
+    return ['--config', config_path, 'show-config']
+
+
+def measure_startup(repeat: int, config_path: str) -> List[float]:
+    """Measures the wall time (in ms) of a full CLI run, from a fresh interpreter to exit."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, os.path.abspath(__file__)] + startup_argv(config_path),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def imported_heavy_modules(config_path: str) -> List[str]:
+    """Returns the heavy modules imported by the cheap startup run of the CLI."""
+    code = (
+        "import sys, io, contextlib; sys.path.insert(0, %r); import main\n"
+        "with contextlib.redirect_stdout(io.StringIO()): main.main(%r)\n"
+        "print(','.join(m for m in %r if m in sys.modules))"
+    ) % (os.path.dirname(os.path.abspath(__file__)), startup_argv(config_path), HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    return [module for module in output.strip().split(',') if module]
+
+
+def cmd_bench(services: Services, args: argparse.Namespace) -> int:
+    """Measures CLI startup time and checks it against the configured budget."""
+    budget_ms = args.budget_ms if args.budget_ms is not None else float(services.config['CLI']['startup_budget_ms'])
+
+    timings = measure_startup(args.repeat, args.config)
+    median_ms = statistics.median(timings)
+    heavy = imported_heavy_modules(args.config)
+
+    print(f"startup: median={median_ms:.1f}ms min={min(timings):.1f}ms max={max(timings):.1f}ms "
+          f"(budget {budget_ms:.0f}ms, {args.repeat} runs)")
+    print(f"heavy modules imported at startup: {', '.join(heavy) if heavy else 'none'}")
+
+    if heavy or median_ms > budget_ms:
+        logger.error("Startup budget exceeded: median=%.1fms budget=%.0fms heavy=%s", median_ms, budget_ms, heavy)
+        return 1
+    return 0
+
+
+def cmd_bench_sink(services: Services, args: argparse.Namespace) -> int:
+    """Uploads synthetic files to the offline sinks and reports the throughput of each one."""
+    import tempfile
+    from data_handlers.sinks import build_sink
+
+    payload = os.urandom(int(args.size_mb * 1024 * 1024))
+    files = {f"/bench/part_{i:04d}.parquet": payload for i in range(args.files)}
+
+    with tempfile.TemporaryDirectory(prefix='sink_bench_') as tmp_dir:
+        for kind in args.sinks:
+            with build_sink(kind, root_dir=os.path.join(tmp_dir, kind), max_workers=args.workers) as sink:
+                start = time.perf_counter()
+                errors = sink.write_many(files)
+                wall_seconds = time.perf_counter() - start
+                failed = sum(error is not None for error in errors.values())
+                print(f"{kind:>14}: {len(files) - failed}/{len(files)} files, "
+                      f"{sink.stats.throughput_mb_s(wall_seconds):.1f} MB/s "
+                      f"({wall_seconds:.3f}s, {args.workers} workers)")
+                if failed:
+                    return 1
+    return 0
+
+
+def cmd_bench_parse(services: Services, args: argparse.Namespace) -> int:
+    """Measures the parse throughput of a delimited file for several worker counts."""
+    from data_handlers.parallel_reader import ParallelDelimitedReader
+
+    delimiter = args.delimiter or ('|' if args.file.endswith('.txt') else ',')
+    size_mb = os.path.getsize(args.file) / (1024 * 1024)
+    baseline = None
+    for workers in args.workers:
+        reader = ParallelDelimitedReader(workers=workers, chunk_bytes=int(args.chunk_mb * 1024 * 1024))
+        start = time.perf_counter()
+        table = reader.read(args.file, delimiter)
+        seconds = time.perf_counter() - start
+        baseline = baseline or seconds
+        print(f"workers={workers:>3}: {table.num_rows} rows, {size_mb / seconds:.1f} MB/s "
+              f"({seconds:.3f}s, speedup x{baseline / seconds:.2f})")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='main.py', description='NexaBank ETL pipeline.')
+    parser.add_argument('--config', default=CONFIG_PATH, help='Path to the config.ini file.')
+    parser.add_argument('--engine', choices=['pandas', 'arrow'], default=None,
+                        help='Dataframe engine of the pipeline (overrides [Pipeline] engine).')
+    parser.add_argument('--profile', action='store_true', help='Profile every pipeline stage of this run.')
+    parser.add_argument('--profile-tables', default=None,
+                        help='Comma separated tables to profile (implies --profile; default: all tables).')
+    parser.add_argument('--profile-mode', choices=['cprofile', 'sampling'], default=None, help='Profiler to use.')
+    parser.add_argument('--profile-dir', default=None, help='Directory for the profiling reports.')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Reprocess every file even if its content was already processed (disables [ResultCache]).')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    stream_parser = subparsers.add_parser('stream', help='Watch the datalake and process new files continuously.')
+    stream_parser.add_argument('--workers', type=int, default=5, help='Number of pipeline worker threads.')
+    stream_parser.add_argument('--processes', type=int, default=1,
+                               help='Number of worker processes sharing the tables (enables sharding).')
+    stream_parser.add_argument('--worker-id', default=None,
+                               help='Identity of this worker in the shard group (enables sharding).')
+    stream_parser.set_defaults(func=cmd_stream)
+
+    run_parser = subparsers.add_parser('run-partition', help='Process a single date/hour partition once.')
+    run_parser.add_argument('--date', required=True, help='Partition date (YYYY-MM-DD).')
+    run_parser.add_argument('--hour', required=True, type=int, help='Partition hour (0-23).')
+    run_parser.set_defaults(func=cmd_run_partition)
+
+    backfill_parser = subparsers.add_parser('backfill', help='Process every partition in a date/hour range.')
+    backfill_parser.add_argument('--start-date', required=True, help='First partition date (YYYY-MM-DD).')
+    backfill_parser.add_argument('--start-hour', type=int, default=0, help='First partition hour.')
+    backfill_parser.add_argument('--end-date', required=True, help='Last partition date (YYYY-MM-DD).')
+    backfill_parser.add_argument('--end-hour', type=int, default=23, help='Last partition hour.')
+    backfill_parser.set_defaults(func=cmd_backfill)
+
+    validate_parser = subparsers.add_parser('validate', help='Run the data quality checks on a partition only.')
+    validate_parser.add_argument('--date', required=True, help='Partition date (YYYY-MM-DD).')
+    validate_parser.add_argument('--hour', required=True, type=int, help='Partition hour (0-23).')
+    validate_parser.add_argument('--notify', action='store_true',
+                                 help='Email check failures like the pipeline does (off by default).')
+    validate_parser.set_defaults(func=cmd_validate)
+
+    show_config_parser = subparsers.add_parser('show-config', help='Print the effective configuration and exit.')
+    show_config_parser.set_defaults(func=cmd_show_config)
+
+    bench_parser = subparsers.add_parser('bench', help='Measure CLI startup time against the budget.')
+    bench_parser.add_argument('--repeat', type=int, default=10, help='Number of cold starts to time.')
+    bench_parser.add_argument('--budget-ms', type=float, default=None, help='Override the configured budget.')
+    bench_parser.set_defaults(func=cmd_bench)
+
+    bench_sink_parser = subparsers.add_parser('bench-sink', help='Measure upload throughput of the offline sinks.')
+    bench_sink_parser.add_argument('--sinks', nargs='+', default=['local', 'local_webhdfs'],
+                                   choices=['local', 'local_webhdfs'], help='Sinks to benchmark.')
+    bench_sink_parser.add_argument('--files', type=int, default=16, help='Number of files to upload.')
+    bench_sink_parser.add_argument('--size-mb', type=float, default=4, help='Size of each file in MB.')
+    bench_sink_parser.add_argument('--workers', type=int, default=4, help='Number of concurrent uploads.')
+    bench_sink_parser.set_defaults(func=cmd_bench_sink)
+
+    bench_parse_parser = subparsers.add_parser('bench-parse', help='Measure parallel parse throughput of a file.')
+    bench_parse_parser.add_argument('file', help='CSV or pipe delimited TXT file.')
+    bench_parse_parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                                    help='Worker counts to measure.')
+    bench_parse_parser.add_argument('--delimiter', default=None, help='Field delimiter (default by extension).')
+    bench_parse_parser.add_argument('--chunk-mb', type=float, default=64, help='Target byte range size in MB.')
+    bench_parse_parser.set_defaults(func=cmd_bench_parse)
+
+    return parser
+
+
+def apply_profiling_args(config: configparser.ConfigParser, args: argparse.Namespace) -> None:
+    """Lets the command line override the [Profiling] section for a single run."""
+    if not config.has_section('Profiling'):
+        config.add_section('Profiling')
+    if args.profile or args.profile_tables:
+        config['Profiling']['enabled'] = 'true'
+    if args.profile_tables:
+        config['Profiling']['tables'] = args.profile_tables
+    if args.profile_mode:
+        config['Profiling']['mode'] = args.profile_mode
+    if args.profile_dir:
+        config['Profiling']['output_dir'] = args.profile_dir
+
+
+def worker_path(path: str, worker_id: str) -> str:
+    """Suffixes a file name with a worker id, e.g. ETL.log -> ETL.host-0.log."""
+    base, extension = os.path.splitext(path)
+    return f"{base}.{worker_id}{extension}"
+
+
+def apply_sharding_args(config: configparser.ConfigParser, args: argparse.Namespace) -> None:
+    """
+    Enables sharding for stream workers started with --processes or --worker-id.
+
+    A worker with an id gets its own log file and result cache index: rotating one log file or rewriting one
+    index from several processes would lose data.
+    """
+    if getattr(args, 'processes', 1) > 1 or getattr(args, 'worker_id', None):
+        if not config.has_section('Sharding'):
+            config.add_section('Sharding')
+        config['Sharding']['enabled'] = 'true'
+        if args.worker_id:
+            config['Sharding']['worker_id'] = args.worker_id
+            if not config.has_section('Logging'):
+                config.add_section('Logging')
+            config['Logging']['file'] = worker_path(config.get('Logging', 'file', fallback='ETL.log'), args.worker_id)
+            if config.has_section('ResultCache'):
+                config['ResultCache']['index_path'] = worker_path(
+                    config.get('ResultCache', 'index_path', fallback='result_cache.json'), args.worker_id)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser().parse_args(argv)
+    args.argv = argv
+    config = load_config(args.config)
+    apply_sharding_args(config, args)
+    apply_profiling_args(config, args)
+    if args.no_cache and config.has_section('ResultCache'):
+        config['ResultCache']['enabled'] = 'false'
+    if args.engine:
+        if not config.has_section('Pipeline'):
+            config.add_section('Pipeline')
+        config['Pipeline']['engine'] = args.engine
+    setup_logger(**logging_options(config))
+    services = Services(config)
+    return args.func(services, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,16 +1,82 @@
 import logging
 import os.path
-from typing import Dict, Any
+from contextlib import nullcontext
+from typing import Dict, Any, Optional, Callable, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
 
-def extract_all_tables(datalake_el_obj: Any, files: Dict[str, str]) -> Dict[str, Any]:
+def _profiled(profiler: Optional[Any], stage: str, table_name: str = '*') -> Any:
+    """Returns the profiling context for a stage, or a no-op context when profiling is off."""
+    return profiler.section(stage, table_name) if profiler is not None else nullcontext()
+
+
+def table_output_path(hdfs_writing_path: str, table_name: str, date: str, hour: int, source: str = '') -> str:
+    """Returns the Parquet path a table is written to for a given date, hour and (optional) source."""
+    suffix = '_' + source if source else ''
+    return os.path.join(hdfs_writing_path, table_name, 'data_' + date + '_' + str(hour) + suffix + '.parquet')
+
+
+def skip_cached_files(result_cache: Any, files: Dict[str, str], hdfsEL_obj: Any, data_quality_obj: Any,
+                      hdfs_writing_path: str, date: str, hour: int, on_hit: str = 'skip',
+                      source: str = '') -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Drops the files whose exact content was already processed.
+
+    :param result_cache: ResultCache mapping input content to previous outputs.
+    :param files: Dictionary where keys are filenames and values are file paths.
+    :param data_quality_obj: DataQuality object used to restamp the partition columns of copied outputs.
+    :param on_hit: 'skip' to do nothing for cached files, 'copy' to rewrite the previous output into this hour.
+    :param source: Name of the source root the files come from ('' for a single root).
+    :return: The files still to process, and the content digest of each of them.
+    """
+    remaining: Dict[str, str] = {}
+    digests: Dict[str, str] = {}
+
+    for file, path in files.items():
+        table_name = file.split(".")[0]
+        digest = result_cache.hash(path)
+        entry = result_cache.get(table_name, digest)
+
+        if entry is not None and not hdfsEL_obj.sink.exists(entry['output']):
+            logger.info("Cached output %s of file %s no longer exists. Reprocessing.", entry['output'], file)
+            result_cache.invalidate(table_name, digest)
+            entry = None
+
+        if entry is not None and on_hit == 'copy':
+            target = table_output_path(hdfs_writing_path, table_name, date, hour, source)
+            try:
+                if target != entry['output']:
+                    # The previous output carries the partition columns of its own hour; rewrite them.
+                    table = data_quality_obj.restamp_quality_columns_arrow(
+                        hdfsEL_obj.read_parquet(entry['output']), date, hour)
+                    hdfsEL_obj.load_from_dataframe_as_parquet(table, target)
+                logger.info("Copied cached output of %s from %s to %s", file, entry['output'], target)
+            except Exception as e:
+                logger.error("Failed to reuse cached output %s for file %s. Reprocessing. Error: %s",
+                             entry['output'], file, str(e))
+                result_cache.invalidate(table_name, digest)
+                entry = None
+        elif entry is not None:
+            logger.info("Skipping file %s: identical content already processed into %s", file, entry['output'])
+
+        if entry is None:
+            result_cache.miss()
+            remaining[file] = path
+            digests[file] = digest
+        else:
+            result_cache.hit(entry)
+
+    return remaining, digests
+
+
+def extract_all_tables(datalake_el_obj: Any, files: Dict[str, str], profiler: Optional[Any] = None) -> Dict[str, Any]:
     """
     Extracts all tables from the given files, processes them, and returns a dictionary of dataframes.
 
     :param datalake_el_obj: Object responsible for extracting data from the datalake.
     :param files: Dictionary where keys are filenames and values are file paths.
+    :param profiler: Optional StageProfiler wrapping each table's extraction.
     :return: Dictionary of extracted dataframes with table names as keys.
     """
     dict_of_dataframes: Dict[str, Any] = {}
@@ -23,7 +89,8 @@ def extract_all_tables(datalake_el_obj: Any, files: Dict[str, str]) -> Dict[str,
 
         try:
             logger.info("Extracting data for table: %s", table_name)
-            dataframe = datalake_el_obj.extract_from_datalake(path)
+            with _profiled(profiler, 'extract', table_name):
+                dataframe = datalake_el_obj.extract_from_datalake(path)
             dict_of_dataframes[table_name] = dataframe
 
             logger.info("Data extracted successfully for table: %s with %d rows", table_name, dataframe.shape[0])
@@ -34,8 +101,8 @@ def extract_all_tables(datalake_el_obj: Any, files: Dict[str, str]) -> Dict[str,
     return dict_of_dataframes
 
 
-def apply_checks_on_all_tables(data_quality_obj: Any, dict_of_dataframes: Dict[str, Any], date: str, hour: int, email_sender_obj: Any, recipient_email: str) -> Dict[
-    str, Any]:
+def apply_checks_on_all_tables(data_quality_obj: Any, dict_of_dataframes: Dict[str, Any], date: str, hour: int, email_sender_obj: Any, recipient_email: str,
+                               profiler: Optional[Any] = None, emptied: Optional[Set[str]] = None) -> Dict[str, Any]:
     """
     Applies data quality checks on all tables in the dictionary and returns the filtered tables.
 
@@ -43,6 +110,8 @@ def apply_checks_on_all_tables(data_quality_obj: Any, dict_of_dataframes: Dict[s
     :param dict_of_dataframes: Dictionary containing table names and dataframes.
     :param date: Current date string.
     :param hour: Current hour as integer.
+    :param profiler: Optional StageProfiler wrapping each table's checks.
+    :param emptied: Optional set collecting the tables whose rows were all filtered out (as opposed to failed).
     :return: Dictionary with table names and dataframes after applying checks.
     """
     dict_of_checked_dataframes: Dict[str, Any] = {}
@@ -52,9 +121,10 @@ def apply_checks_on_all_tables(data_quality_obj: Any, dict_of_dataframes: Dict[s
         logger.info("Applying data quality checks for table: %s with %d rows before checks", table_name, rows_before)
 
         try:
-            results = data_quality_obj.apply_checks(dataframe, table_name, date, hour)
+            with _profiled(profiler, 'checks', table_name):
+                results = data_quality_obj.apply_checks(dataframe, table_name, date, hour)
 
-            if not results.empty:
+            if results.shape[0] > 0:
                 dict_of_checked_dataframes[table_name] = results
                 rows_after = results.shape[0]
                 logger.info("Data quality checks filtered table: %s. %d rows passed the checks, %d rows after filter",
@@ -62,6 +132,8 @@ def apply_checks_on_all_tables(data_quality_obj: Any, dict_of_dataframes: Dict[s
             else:
                 logger.info("Data quality checks filtered all rows for table: %s. %d rows filtered out", table_name,
                             rows_before)
+                if emptied is not None:
+                    emptied.add(table_name)
 
         except Exception as e:
             error_msg = f"Error applying data quality checks for table {table_name}. Error: {str(e)}"
@@ -72,12 +144,14 @@ def apply_checks_on_all_tables(data_quality_obj: Any, dict_of_dataframes: Dict[s
     return dict_of_checked_dataframes
 
 
-def apply_transformations_on_all_tables(transformer_obj: Any, dict_of_dataframes: Dict[str, Any]) -> Dict[str, Any]:
+def apply_transformations_on_all_tables(transformer_obj: Any, dict_of_dataframes: Dict[str, Any],
+                                        profiler: Optional[Any] = None) -> Dict[str, Any]:
     """
     Applies transformations to all tables and returns the transformed dataframes.
 
     :param transformer_obj: Object responsible for applying transformations.
     :param dict_of_dataframes: Dictionary containing table names and dataframes.
+    :param profiler: Optional StageProfiler wrapping each table's transformation.
     :return: Dictionary with transformed dataframes.
     """
     dict_of_transformed_dataframes: Dict[str, Any] = {}
@@ -87,7 +161,8 @@ def apply_transformations_on_all_tables(transformer_obj: Any, dict_of_dataframes
         logger.info("Starting transformation for table: %s with %d rows", table_name, rows_before)
 
         try:
-            transformed_dataframe = transformer_obj.run_transform(table_name, dataframe)
+            with _profiled(profiler, 'transform', table_name):
+                transformed_dataframe = transformer_obj.run_transform(table_name, dataframe)
             rows_after = transformed_dataframe.shape[0]
             dict_of_transformed_dataframes[table_name] = transformed_dataframe
             logger.info("Transformation complete for table: %s. %d rows after transformation", table_name, rows_after)
@@ -98,26 +173,45 @@ def apply_transformations_on_all_tables(transformer_obj: Any, dict_of_dataframes
     return dict_of_transformed_dataframes
 
 
-def save_all_dataframes(hdfsEL_obj: Any, dataframes: Dict[str, Any], hdfs_writing_path: str, date: str, hour: int) -> None:
+def save_all_dataframes(hdfsEL_obj: Any, dataframes: Dict[str, Any], hdfs_writing_path: str, date: str, hour: int,
+                        profiler: Optional[Any] = None, on_saved: Optional[Callable[[str, str], None]] = None,
+                        source: str = '') -> int:
     """
-    Saves all dataframes to HDFS.
+    Saves all dataframes to HDFS, uploading the tables concurrently.
 
     :param hdfsEL_obj: Object responsible for loading data to HDFS.
     :param dataframes: Dictionary containing table names and dataframes.
     :param date: Current date string.
     :param hour: Current hour as integer.
+    :param profiler: Optional StageProfiler wrapping each table's Parquet encoding and upload.
+    :param on_saved: Optional callback called with the table name and path of every table saved.
+    :param source: Name of the source root the tables come from ('' for a single root).
+    :return: Number of tables saved successfully.
     """
     success_count = 0
+    paths: Dict[str, str] = {}
 
     for key, df in dataframes.items():
-        hdfs_full_path = os.path.join(hdfs_writing_path, key, 'data_' + date + '_' + str(hour) + '.parquet')
+        hdfs_full_path = table_output_path(hdfs_writing_path, key, date, hour, source)
         logger.info("Starting to save table: %s to HDFS path: %s at %s %s", key, hdfs_full_path, date, hour)
+        paths[hdfs_full_path] = key
 
-        try:
-            hdfsEL_obj.load_from_dataframe_as_parquet(df, hdfs_full_path)
+    # Parquet encoding and upload run on the sink's threads; each table is profiled on the thread doing its work.
+    errors = hdfsEL_obj.load_dataframes_as_parquet(
+        {path: dataframes[key] for path, key in paths.items()},
+        section=(lambda path: _profiled(profiler, 'save', paths[path])) if profiler is not None else None
+    )
+
+    for hdfs_full_path, key in paths.items():
+        error = errors.get(hdfs_full_path)
+        if error is None:
             logger.info("Successfully saved table: %s to HDFS path: %s at %s %s", key, hdfs_full_path, date, hour)
             success_count += 1
-        except Exception as e:
+            if on_saved is not None:
+                on_saved(key, hdfs_full_path)
+        else:
             logger.error("Error saving table: %s to HDFS path: %s at %s %s. Error: %s", key, hdfs_full_path, date, hour,
-                         str(e))
-    return success_count
\ No newline at end of file
+                         str(error))
+
+    logger.info("Sink '%s' totals: %s", hdfsEL_obj.sink.name, hdfsEL_obj.sink.stats.snapshot())
+    return success_count
@@ -0,0 +1,201 @@
+import os
+import time
+import logging
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BatchKey = Tuple[str, str, int]
+
+
+class PendingBatch:
+    """Files collected for one source, date and hour that have not been dispatched yet."""
+
+    def __init__(self, now: float) -> None:
+        self.files: Dict[str, str] = {}
+        self.bytes: int = 0
+        self.first_seen: float = now
+        self.last_seen: float = now
+
+    def add(self, files: Dict[str, str], now: float) -> None:
+        for file, path in files.items():
+            self.files[file] = path
+            try:
+                self.bytes += os.path.getsize(path)
+            except OSError:
+                pass
+        self.last_seen = now
+
+    def tables(self) -> set:
+        return {file.split(".")[0] for file in self.files}
+
+
+class BatchStats:
+    """Sizes and waiting times of the batches actually dispatched."""
+
+    def __init__(self) -> None:
+        self.sizes: List[int] = []
+        self.bytes: List[int] = []
+        self.waits: List[float] = []
+        self.reasons: Counter = Counter()
+
+    def record(self, batch: PendingBatch, wait: float, reason: str) -> None:
+        self.sizes.append(len(batch.files))
+        self.bytes.append(batch.bytes)
+        self.waits.append(wait)
+        self.reasons[reason] += 1
+
+    @staticmethod
+    def _percentile(values: List[float], percentile: float) -> float:
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))] if ordered else 0.0
+
+    def report(self) -> Dict[str, Any]:
+        batches = len(self.sizes)
+        return {
+            'batches': batches,
+            'files': sum(self.sizes),
+            'mean_files_per_batch': round(sum(self.sizes) / batches, 2) if batches else 0.0,
+            'max_files_per_batch': max(self.sizes, default=0),
+            'mean_batch_mb': round(sum(self.bytes) / batches / (1024 * 1024), 2) if batches else 0.0,
+            'wait_p50_s': round(self._percentile(self.waits, 50), 3),
+            'wait_p95_s': round(self._percentile(self.waits, 95), 3),
+            'wait_max_s': round(max(self.waits, default=0.0), 3),
+            'flush_reasons': dict(self.reasons),
+        }
+
+
+class AdaptiveBatcher:
+    """
+    Coalesces new files of a Stream into fewer, larger batches.
+
+    Files are collected per (source, date, hour). A batch is dispatched when one of these happens:
+
+    - ``complete``: every expected table has arrived (only the tables this worker owns, when sharded);
+    - ``size``: it holds `max_files` files or `max_bytes` bytes;
+    - ``window``: no new file arrived for the adaptive window;
+    - ``max_wait``: its first file has waited `max_wait` seconds (the latency bound);
+    - ``hour_closed``: the stream moved on to another hour.
+
+    The window follows the arrival rate: it is `gap_multiplier` times the moving average of the gaps between
+    arrivals (capped at `max_wait`). Until a source has a gap history, the window is `initial_wait`. When
+    feeds arrive too far apart for waiting to pay off, the window drops to `min_wait` and files are dispatched
+    almost immediately.
+    """
+
+    def __init__(
+        self,
+        stream: Any,
+        max_wait: float = 30.0,
+        min_wait: float = 0.0,
+        max_files: int = 50,
+        max_bytes: int = 1024 * 1024 * 1024,
+        gap_multiplier: float = 2.0,
+        smoothing: float = 0.3,
+        poll_interval: float = 1.0,
+        expected_tables: Optional[Iterable[str]] = None,
+        report_every: int = 20,
+        initial_wait: Optional[float] = None,
+        owns: Optional[Callable[[str, str], bool]] = None,
+    ) -> None:
+        """
+        :param initial_wait: Window of a source with no gap history yet (defaults to `min_wait`).
+        :param owns: Optional ownership check (source, table) of a sharded worker; the ``complete`` flush then
+                     only waits for the expected tables this worker owns.
+        """
+        self.stream = stream
+        self.max_wait = max_wait
+        self.min_wait = min_wait
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.gap_multiplier = gap_multiplier
+        self.smoothing = smoothing
+        self.poll_interval = poll_interval
+        self.expected_tables = set(expected_tables or [])
+        self.report_every = report_every
+        self.initial_wait = min_wait if initial_wait is None else initial_wait
+        self.owns = owns
+        self.pending: Dict[BatchKey, PendingBatch] = {}
+        self.stats = BatchStats()
+        self._gap: Dict[str, float] = {}
+        self._last_arrival: Dict[str, float] = {}
+
+    def window(self, source: str) -> float:
+        """Time to wait for more files after the last arrival from a source."""
+        gap = self._gap.get(source)
+        if gap is None:
+            return min(self.initial_wait, self.max_wait)
+        window = gap * self.gap_multiplier
+        if window >= self.max_wait:
+            return self.min_wait
+        return max(self.min_wait, window)
+
+    def _observe_arrival(self, source: str, now: float) -> None:
+        last = self._last_arrival.get(source)
+        self._last_arrival[source] = now
+        if last is None:
+            return
+        gap = min(now - last, self.max_wait)
+        previous = self._gap.get(source)
+        self._gap[source] = gap if previous is None else self.smoothing * gap + (1 - self.smoothing) * previous
+
+    def add(self, source: str, files: Dict[str, str], date: str, hour: int, now: float) -> None:
+        self._observe_arrival(source, now)
+        key = (source, date, hour)
+        if key not in self.pending:
+            self.pending[key] = PendingBatch(now)
+        self.pending[key].add(files, now)
+
+    def expected(self, source: str) -> set:
+        """Tables a complete batch of a source holds: the expected tables this worker owns."""
+        if self.owns is None:
+            return self.expected_tables
+        return {table for table in self.expected_tables if self.owns(source, table)}
+
+    def flush_reason(self, key: BatchKey, batch: PendingBatch, now: float, current: Tuple[str, int]) -> Optional[str]:
+        if (key[1], key[2]) != current:
+            return 'hour_closed'
+        expected = self.expected(key[0])
+        if expected and expected <= batch.tables():
+            return 'complete'
+        if len(batch.files) >= self.max_files or batch.bytes >= self.max_bytes:
+            return 'size'
+        if now - batch.first_seen >= self.max_wait:
+            return 'max_wait'
+        if now - batch.last_seen >= self.window(key[0]):
+            return 'window'
+        return None
+
+    def ready(self, now: float) -> Optional[Tuple[BatchKey, str]]:
+        """Returns the oldest pending batch that should be dispatched now, with the reason."""
+        time_manager = self.stream.time_manager
+        current = (time_manager.current_date, time_manager.current_hour)
+        for key, batch in sorted(self.pending.items(), key=lambda item: item[1].first_seen):
+            reason = self.flush_reason(key, batch, now, current)
+            if reason is not None:
+                return key, reason
+        return None
+
+    def flush(self, key: BatchKey, reason: str, now: float) -> Tuple[str, Dict[str, str], str, int]:
+        batch = self.pending.pop(key)
+        wait = now - batch.first_seen
+        self.stats.record(batch, wait, reason)
+        logger.info("Dispatching batch of %d files (%d bytes) for source=%r date=%s hour=%d after %.2fs (%s)",
+                    len(batch.files), batch.bytes, key[0], key[1], key[2], wait, reason)
+        if self.report_every and len(self.stats.sizes) % self.report_every == 0:
+            logger.info("Micro-batching so far: %s", self.stats.report())
+        return key[0], batch.files, key[1], key[2]
+
+    def next_batch(self) -> Tuple[str, Dict[str, str], str, int]:
+        """Blocks until a batch is due and returns (source, files, date, hour), like Stream.stream_with_source()."""
+        while True:
+            now = time.monotonic()
+            for source, files, date, hour in self.stream.poll():
+                self.add(source, files, date, hour, now)
+
+            now = time.monotonic()
+            due = self.ready(now)
+            if due is not None:
+                return self.flush(due[0], due[1], now)
+            time.sleep(self.poll_interval)
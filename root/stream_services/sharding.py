@@ -0,0 +1,274 @@
+import os
+import json
+import time
+import bisect
+import socket
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+
+class ConsistentHashRing:
+    """Consistent hash ring with virtual nodes; adding or removing a worker only moves ~1/N of the keys."""
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 64) -> None:
+        self.vnodes = vnodes
+        self.nodes: Set[str] = set()
+        self._ring: List[int] = []
+        self._owners: Dict[int, str] = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str) -> None:
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            self._owners[point] = node
+            bisect.insort(self._ring, point)
+
+    def remove(self, node: str) -> None:
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            if self._owners.pop(point, None) is not None:
+                self._ring.remove(point)
+
+    def node_for(self, key: str) -> Optional[str]:
+        if not self._ring:
+            return None
+        index = bisect.bisect(self._ring, _hash(key)) % len(self._ring)
+        return self._owners[self._ring[index]]
+
+
+class ShardCoordinator:
+    """
+    Shares the ingestion work between workers (processes or hosts) through a shared directory.
+
+    - Membership: every worker keeps a heartbeat file under ``workers/``; workers whose heartbeat is older
+      than ``worker_timeout`` are considered gone and the ring is rebuilt without them (rebalancing).
+    - Assignment: each (source, table) pair belongs to one worker of the consistent hash ring.
+    - Claiming: before processing, a worker takes a lease on the file (``leases/``, created with O_EXCL).
+      Leases are renewed by the heartbeat thread, expire after ``lease_seconds`` if the holder dies, and are
+      replaced by a permanent ``done/`` marker once the file is processed, so no file is processed twice.
+    """
+
+    def __init__(self, coordination_dir: str, worker_id: Optional[str] = None, lease_seconds: float = 300,
+                 heartbeat_seconds: float = 10, vnodes: int = 64) -> None:
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.worker_timeout = heartbeat_seconds * 3
+        self.vnodes = vnodes
+        self.workers_dir = os.path.join(coordination_dir, 'workers')
+        self.leases_dir = os.path.join(coordination_dir, 'leases')
+        self.done_dir = os.path.join(coordination_dir, 'done')
+        for directory in (self.workers_dir, self.leases_dir, self.done_dir):
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._held: Set[str] = set()
+        self._tokens: Dict[str, str] = {}
+        self._ring = ConsistentHashRing([self.worker_id], vnodes)
+        self._ring_checked = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Membership ---
+
+    def _heartbeat_path(self, worker_id: str) -> str:
+        return os.path.join(self.workers_dir, worker_id)
+
+    def heartbeat(self) -> None:
+        with open(self._heartbeat_path(self.worker_id), 'w', encoding='utf-8') as f:
+            f.write(str(time.time()))
+        with self._lock:
+            held = list(self._held)
+        for key in held:
+            self._write_lease(key)
+
+    def live_workers(self) -> List[str]:
+        now = time.time()
+        workers = [self.worker_id]
+        for worker_id in os.listdir(self.workers_dir):
+            if worker_id == self.worker_id:
+                continue
+            try:
+                if now - os.path.getmtime(self._heartbeat_path(worker_id)) <= self.worker_timeout:
+                    workers.append(worker_id)
+            except FileNotFoundError:
+                continue
+        return sorted(workers)
+
+    def ring(self) -> ConsistentHashRing:
+        """Returns the hash ring of the live workers, rebuilt at most once per heartbeat interval."""
+        now = time.time()
+        if now - self._ring_checked >= self.heartbeat_seconds:
+            workers = set(self.live_workers())
+            if workers != self._ring.nodes:
+                logger.info("Rebalancing shards: workers %s -> %s", sorted(self._ring.nodes), sorted(workers))
+                self._ring = ConsistentHashRing(workers, self.vnodes)
+            self._ring_checked = now
+        return self._ring
+
+    def start(self) -> 'ShardCoordinator':
+        self.heartbeat()
+        self._thread = threading.Thread(target=self._run, name='shard-heartbeat', daemon=True)
+        self._thread.start()
+        logger.info("Worker %s joined the shard group", self.worker_id)
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.heartbeat_seconds):
+            try:
+                self.heartbeat()
+            except OSError as e:
+                logger.error("Heartbeat failed for worker %s: %s", self.worker_id, str(e))
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            held = list(self._held)
+        for key in held:
+            self.release(key)
+        try:
+            os.remove(self._heartbeat_path(self.worker_id))
+        except FileNotFoundError:
+            pass
+        logger.info("Worker %s left the shard group", self.worker_id)
+
+    # --- Assignment ---
+
+    def owns(self, source: str, table_name: str) -> bool:
+        return self.ring().node_for(f"{source}:{table_name}") == self.worker_id
+
+    # --- Claiming ---
+
+    @staticmethod
+    def file_key(file_path: str, root: str, source: str = '') -> str:
+        """
+        Identifies one version of a file; a file dropped again under the same name gets a new key.
+
+        The path is taken relative to its source root, so hosts mounting the shared storage at different
+        paths agree on the key.
+        """
+        stat = os.stat(file_path)
+        relative_path = os.path.relpath(file_path, root).replace(os.sep, '/')
+        identity = f"{source}|{relative_path}|{stat.st_size}|{stat.st_mtime_ns}"
+        return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+    def _lease_path(self, key: str) -> str:
+        return os.path.join(self.leases_dir, key)
+
+    def _done_path(self, key: str) -> str:
+        return os.path.join(self.done_dir, key)
+
+    def _write_lease(self, key: str) -> None:
+        path = self._lease_path(key)
+        tmp_path = f"{path}.{self.worker_id}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'worker': self.worker_id, 'expires': time.time() + self.lease_seconds}, f)
+        os.replace(tmp_path, path)
+
+    def _read_lease(self, key: str) -> Optional[Dict[str, object]]:
+        try:
+            with open(self._lease_path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _take_over(self, key: str) -> bool:
+        """
+        Takes over the lease of a file if it expired. Returns True if this worker now holds it.
+
+        Every version of a lease file (content and mtime) gets its own takeover token, created with O_EXCL, so
+        of all the workers that saw the same expired lease exactly one wins. The lease file is never removed
+        here, only atomically replaced by the winner, so a fresh lease cannot be lost in between.
+        """
+        path = self._lease_path(key)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+                mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        try:
+            lease = json.loads(content) if content else None
+        except ValueError:
+            lease = None
+
+        if lease is None:
+            # Being written right now, or left empty by a worker that died while claiming.
+            if time.time() - mtime_ns / 1e9 < self.lease_seconds:
+                return False
+        elif lease.get('worker') == self.worker_id or lease.get('expires', 0) > time.time():
+            return False
+
+        version = hashlib.sha1(content + str(mtime_ns).encode('ascii')).hexdigest()
+        token_path = f"{path}.takeover.{version}"
+        try:
+            os.close(os.open(token_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+        self._write_lease(key)
+        with self._lock:
+            self._tokens[key] = token_path
+        return True
+
+    def claim(self, file_path: str, root: str, source: str = '') -> Optional[str]:
+        """Takes the lease on a file. Returns the lease key, or None if the file is done or leased elsewhere."""
+        key = self.file_key(file_path, root, source)
+        if os.path.exists(self._done_path(key)):
+            return None
+        try:
+            os.close(os.open(self._lease_path(key), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            self._write_lease(key)
+        except FileExistsError:
+            if not self._take_over(key):
+                return None
+            logger.info("Worker %s took over the expired lease of %s", self.worker_id, file_path)
+        with self._lock:
+            self._held.add(key)
+
+        # Another worker may have completed the file between the first check and the lease.
+        if os.path.exists(self._done_path(key)):
+            self.release(key)
+            return None
+        return key
+
+    def complete(self, key: str) -> None:
+        """Marks a claimed file as processed for good and drops its lease."""
+        with open(self._done_path(key), 'w', encoding='utf-8') as f:
+            f.write(self.worker_id)
+        self.release(key)
+        # Once the file is done, late claimers stop at the done marker; the takeover token can go.
+        with self._lock:
+            token_path = self._tokens.pop(key, None)
+        if token_path is not None:
+            try:
+                os.remove(token_path)
+            except FileNotFoundError:
+                pass
+
+    def release(self, key: str) -> None:
+        """Drops a lease without marking the file as processed, so another worker may retry it."""
+        with self._lock:
+            self._held.discard(key)
+        lease = self._read_lease(key)
+        if lease is not None and lease.get('worker') == self.worker_id:
+            try:
+                os.remove(self._lease_path(key))
+            except FileNotFoundError:
+                pass
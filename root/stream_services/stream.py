@@ -1,8 +1,9 @@
 import os
+import time
 from datetime import datetime, timedelta
 import logging
 from utilities.utils_function import is_file_stable
-from typing import Dict, Tuple, List
+from typing import Any, Dict, List, Optional, Tuple, Union
 logger = logging.getLogger(__name__)
 
 
@@ -33,26 +34,74 @@ class TimeManager:
 
 
 class Stream:
-    def __init__(self, main_dir: str, date: str, hour: int) -> None:
-        self.main_dir: str = main_dir
+    def __init__(self, main_dir: Union[str, List[str]], date: str, hour: int, coordinator: Optional[Any] = None,
+                 retry_seconds: float = 30, max_retry_seconds: float = 600) -> None:
+        """
+        :param main_dir: Root directory of the datalake, or a list of roots (one per branch or source system).
+        :param coordinator: Optional ShardCoordinator; when given, only the (source, table) pairs this worker
+                            owns are picked up, and every file is claimed with a lease before it is returned.
+        :param retry_seconds: Delay before a file that failed is picked up again, doubled after each failure
+                              up to `max_retry_seconds`.
+        """
+        self.main_dirs: List[str] = [main_dir] if isinstance(main_dir, str) else list(main_dir)
+        self.main_dir: str = self.main_dirs[0]
         self.time_manager: TimeManager = TimeManager(date, hour)
         self.cache_current_files: Dict[str, str] = {}
+        self.coordinator = coordinator
+        self.leases: Dict[str, str] = {}
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.failures: Dict[str, int] = {}
+        self.retry_at: Dict[str, float] = {}
+        self._next_source: int = 0
+
+    def source_name(self, main_dir: str) -> str:
+        """Label of a source root; empty for a single root so output paths stay unchanged."""
+        return os.path.basename(os.path.normpath(main_dir)) if len(self.main_dirs) > 1 else ''
 
     def stream(self) -> Tuple[Dict[str, str], str, int]:
         """Streams the files, checking if new ones are available, and returns new files along with current date and hour."""
-        while True:
-            hour_changed = self.time_manager.update_if_needed()
-            if hour_changed:
-                self.cache_current_files.clear()
-            full_path: str = self.time_manager.get_current_path(self.main_dir)
+        _, new_files, date, hour = self.stream_with_source()
+        return new_files, date, hour
 
-            files: list[str] = self.get_files(full_path)
-            if not self.files_exist(files):
-                continue
+    def stream_with_source(self) -> Tuple[str, Dict[str, str], str, int]:
+        """Like stream(), for several roots: returns the new files of one source (visited round-robin) and its name."""
+        while True:
+            self.check_hour()
+            for _ in range(len(self.main_dirs)):
+                main_dir = self.main_dirs[self._next_source]
+                self._next_source = (self._next_source + 1) % len(self.main_dirs)
+                new_files = self.scan(main_dir)
+                if new_files:
+                    return (self.source_name(main_dir), new_files,
+                            self.time_manager.current_date, self.time_manager.current_hour)
 
-            new_files: Dict[str, str] = self.get_new_files(files, full_path)
+    def poll(self) -> List[Tuple[str, Dict[str, str], str, int]]:
+        """Scans every source once without blocking and returns (source, new files, date, hour) for each one with new files."""
+        self.check_hour()
+        found = []
+        for main_dir in self.main_dirs:
+            new_files = self.scan(main_dir)
             if new_files:
-                return new_files, self.time_manager.current_date, self.time_manager.current_hour
+                found.append((self.source_name(main_dir), new_files,
+                              self.time_manager.current_date, self.time_manager.current_hour))
+        return found
+
+    def check_hour(self) -> None:
+        """Moves to the next hour when needed, forgetting the files seen in the previous one."""
+        hour_changed = self.time_manager.update_if_needed()
+        if hour_changed:
+            self.cache_current_files.clear()
+            self.failures.clear()
+            self.retry_at.clear()
+
+    def scan(self, main_dir: str) -> Dict[str, str]:
+        """Returns the new files of one source root for the current date and hour."""
+        full_path: str = self.time_manager.get_current_path(main_dir)
+        files: list[str] = self.get_files(full_path)
+        if not self.files_exist(files):
+            return {}
+        return self.get_new_files(files, full_path, self.source_name(main_dir), main_dir)
 
     def get_files(self, path: str) -> list[str]:
         """Returns a list of files in the given path."""
@@ -62,20 +111,56 @@ class Stream:
         """Checks if any files exist."""
         return bool(files)
 
-    def get_new_files(self, files: List[str], path: str) -> Dict[str, str]:
-        """Filters and returns stable, uncached new files."""
+    def get_new_files(self, files: List[str], path: str, source: str = '', main_dir: Optional[str] = None) -> Dict[str, str]:
+        """Filters and returns stable, uncached new files (owned and claimed by this worker when sharded)."""
         new_files: Dict[str, str] = {}
         for file in files:
-            if file not in self.cache_current_files:
-                file_path = os.path.join(path, file)
-                if is_file_stable(file_path):
-                    self.cache_current_files[file] = file_path
-                    new_files[file] = file_path
+            file_path = os.path.join(path, file)
+            if file_path in self.cache_current_files:
+                continue
+            if time.monotonic() < self.retry_at.get(file_path, 0):
+                continue
+            if self.coordinator is not None and not self.coordinator.owns(source, file.split(".")[0]):
+                continue
+            if is_file_stable(file_path):
+                if self.coordinator is not None:
+                    lease = self.coordinator.claim(file_path, main_dir or self.main_dir, source)
+                    if lease is None:
+                        continue
+                    self.leases[file_path] = lease
+                self.cache_current_files[file_path] = file_path
+                new_files[file] = file_path
         return new_files
 
+    def finish(self, files: Dict[str, str], handled: Dict[str, bool]) -> None:
+        """
+        Settles the files of a processed batch.
+
+        Handled files are completed (their lease becomes a permanent done marker). The others are released and
+        dropped from the cache, so this worker, which still owns them, picks them up again after a backoff.
+        """
+        for file, file_path in files.items():
+            lease = self.leases.pop(file_path, None)
+            if handled.get(file, False):
+                self.failures.pop(file_path, None)
+                self.retry_at.pop(file_path, None)
+                if lease is not None:
+                    self.coordinator.complete(lease)
+                continue
+
+            if lease is not None:
+                self.coordinator.release(lease)
+            failures = self.failures.get(file_path, 0) + 1
+            self.failures[file_path] = failures
+            delay = min(self.retry_seconds * 2 ** (failures - 1), self.max_retry_seconds)
+            self.retry_at[file_path] = time.monotonic() + delay
+            self.cache_current_files.pop(file_path, None)
+            logger.warning("File %s was not processed (failure %d); retrying in %.0fs", file_path, failures, delay)
+
     def remove_from_cache(self, file: str) -> bool:
-        """Removes a file from the cache if it exists."""
-        if file in self.cache_current_files:
-            del self.cache_current_files[file]
-            return True
+        """Removes a file (name or full path) from the cache if it exists."""
+        for key in list(self.cache_current_files):
+            if key == file or os.path.basename(key) == file:
+                del self.cache_current_files[key]
+                return True
         return False
@@ -1,5 +1,7 @@
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 from datetime import datetime
 from typing import Callable, Optional
 from crypto_services.Encryptor import CaesarEncryptor
@@ -139,14 +141,65 @@ class Transformer:
         df = self.encrypt_loans_reason(df)
         return df
 
+    # --- Arrow Engine ---
+    # Same transformations as above, computed with pyarrow.compute kernels on Arrow tables.
+
+    def _days_from_today_arrow(self, column: pa.ChunkedArray, divisor: int) -> pa.ChunkedArray:
+        today = pa.scalar(datetime.now().date(), pa.date32())
+        days = pc.days_between(column.cast(pa.date32()), today)
+        if divisor == 1:
+            return days
+        # Floor division, matching Python's `//` for negative spans too.
+        return pc.floor(pc.divide(days.cast(pa.float64()), float(divisor))).cast(pa.int64())
+
+    def transform_customer_profiles_arrow(self, table: pa.Table) -> pa.Table:
+        tenure = self._days_from_today_arrow(table['account_open_date'], 365)
+        segment = pc.if_else(pc.greater(tenure, 5), 'loyal', pc.if_else(pc.less(tenure, 1), 'Newcomer', 'Normal'))
+        table = table.append_column('tenure', tenure)
+        return table.append_column('customer_segment', segment)
+
+    def transform_credit_cards_billing_arrow(self, table: pa.Table) -> pa.Table:
+        amount_due, amount_paid = table['amount_due'], table['amount_paid']
+        due_date = pc.strptime(pc.binary_join_element_wise(table['month'], '-01', ''), format='%Y-%m-%d', unit='ns')
+        late_days = pc.max_element_wise(pc.days_between(due_date, table['payment_date']), 0)
+        fine = pc.multiply(late_days, self.DAILY_FINE_RATE)
+
+        table = table.append_column('fully_paid', pc.equal(amount_due, amount_paid))
+        table = table.append_column('debt', pc.subtract(amount_due, amount_paid))
+        table = table.append_column('late_days', late_days)
+        table = table.append_column('Fine', fine)
+        return table.append_column('total_amount', pc.add(amount_due, fine))
+
+    def transform_support_tickets_arrow(self, table: pa.Table) -> pa.Table:
+        return table.append_column('age', self._days_from_today_arrow(table['complaint_date'], 1))
+
+    def transform_transactions_arrow(self, table: pa.Table) -> pa.Table:
+        amount = table['transaction_amount']
+        cost = pc.add(self.COST_BASE, pc.multiply(self.COST_RATE, amount))
+        table = table.append_column('cost', cost)
+        return table.append_column('total_amount', pc.add(cost, amount))
+
+    def transform_loans_arrow(self, table: pa.Table) -> pa.Table:
+        table = table.append_column('age', self._days_from_today_arrow(table['utilization_date'], 1))
+        table = table.append_column('total_cost', pc.add(pc.multiply(table['amount_utilized'], 0.20), 1000))
+        # No compute kernel for the Caesar shift, so the encryptor still runs per value.
+        random_key = random.randint(1, 25)
+        index = table.schema.get_field_index('loan_reason')
+        encrypted = pa.array([self.encryptor.encrypt(reason, random_key) for reason in table['loan_reason'].to_pylist()],
+                             pa.string())
+        return table.set_column(index, 'loan_reason', encrypted)
+
     # --- Main Dispatcher ---
 
     def run_transform(self, table_name: str, df: pd.DataFrame) -> pd.DataFrame:
         """
         Dispatch transformation based on table name.
+        Arrow tables are routed to the `transform_<table>_arrow` methods.
         Returns original dataframe if transform function not found.
         """
         method_name: str = f"transform_{table_name}"
+        if isinstance(df, pa.Table):
+            method_name += "_arrow"
         transform_func: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = getattr(self, method_name, None)
         if callable(transform_func):
             return transform_func(df)
@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import queue
+import random
+import logging
+import threading
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and is kept in the JSON output.
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exception'] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        return json.dumps(payload, default=str)
+
+
+class SizeAndTimeRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """Rotates the log file on a time schedule and also whenever it grows past max_bytes."""
+
+    def __init__(self, filename: str, max_bytes: int = 0, when: str = 'midnight', backup_count: int = 0,
+                 encoding: Optional[str] = 'utf-8') -> None:
+        super().__init__(filename, when=when, backupCount=backup_count, encoding=encoding, delay=True)
+        self.max_bytes = max_bytes
+
+    def shouldRollover(self, record: logging.LogRecord) -> int:
+        if super().shouldRollover(record):
+            return 1
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.seek(0, os.SEEK_END)
+            if self.stream.tell() >= self.max_bytes:
+                return 1
+        return 0
+
+    def rotation_filename(self, default_name: str) -> str:
+        # Size based rollovers can happen several times within one time interval; never clobber a backup.
+        name, counter = default_name, 1
+        while os.path.exists(name):
+            name = f"{default_name}.{counter}"
+            counter += 1
+        return name
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Drops repeated messages and samples debug records.
+
+    At most `burst` records with the same logger, level and rendered message are let through per `interval`
+    seconds. The first record of the next interval carries the number of suppressed repeats as `suppressed`.
+    Warnings and errors are never rate limited. Debug records are additionally kept with probability
+    `debug_sample_rate`.
+    """
+
+    def __init__(self, burst: int = 20, interval: float = 60.0, debug_sample_rate: float = 1.0) -> None:
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.debug_sample_rate = debug_sample_rate
+        self._lock = threading.Lock()
+        self._windows: Dict[Tuple[str, int, Any], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG and self.debug_sample_rate < 1.0:
+            if random.random() >= self.debug_sample_rate:
+                return False
+        if self.burst <= 0 or record.levelno >= logging.WARNING:
+            return True
+
+        key = (record.name, record.levelno, record.getMessage())
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                if len(self._windows) > 10000:
+                    self._evict(now)
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+    def _evict(self, now: float) -> None:
+        expired = [key for key, window in self._windows.items() if now - window[0] >= self.interval and not window[2]]
+        for key in expired:
+            del self._windows[key]
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never waits: records are dropped (and counted) when the queue is full.
+
+    Drops are reported with a warning record at most every `report_interval` seconds, once the queue has room
+    again, and by the listener when it stops.
+    """
+
+    def __init__(self, log_queue: queue.Queue, report_interval: float = 60.0) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.report_interval = report_interval
+        self._reported = 0
+        self._last_report = time.monotonic()
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge the arguments here; the expensive formatting happens on the listener thread.
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        if self.dropped > self._reported and time.monotonic() - self._last_report >= self.report_interval:
+            report = self.drop_report()
+            if report is not None:
+                try:
+                    self.queue.put_nowait(report)
+                except queue.Full:
+                    with self._lock:
+                        self._reported -= report.dropped
+
+    def drop_report(self) -> Optional[logging.LogRecord]:
+        """Returns a warning record for the records dropped since the last report, or None if there were none."""
+        with self._lock:
+            count = self.dropped - self._reported
+            if count <= 0:
+                return None
+            self._reported = self.dropped
+            self._last_report = time.monotonic()
+        return logging.makeLogRecord({
+            'name': __name__,
+            'levelno': logging.WARNING,
+            'levelname': 'WARNING',
+            'msg': f"Dropped {count} log records because the logging queue was full",
+            'dropped': count,
+        })
+
+
+class DropReportingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that writes out the final drop count of its queue handler when it stops."""
+
+    def __init__(self, log_queue: queue.Queue, *handlers: logging.Handler, queue_handler: NonBlockingQueueHandler,
+                 respect_handler_level: bool = False) -> None:
+        super().__init__(log_queue, *handlers, respect_handler_level=respect_handler_level)
+        self.queue_handler = queue_handler
+
+    def enqueue_sentinel(self) -> None:
+        # The queue may be full when stopping; wait for room instead of failing.
+        self.queue.put(self._sentinel)
+
+    def stop(self) -> None:
+        super().stop()
+        report = self.queue_handler.drop_report()
+        if report is not None:
+            self.handle(report)
+
+
+def setup_async_logging(
+    log_file: str = 'ETL.log',
+    level: int = logging.INFO,
+    json_format: bool = True,
+    max_bytes: int = 50 * 1024 * 1024,
+    backup_count: int = 10,
+    when: str = 'midnight',
+    queue_size: int = 10000,
+    rate_limit_burst: int = 20,
+    rate_limit_interval: float = 60.0,
+    debug_sample_rate: float = 1.0,
+) -> logging.handlers.QueueListener:
+    """
+    Routes the root logger through a queue so that logging calls never block on disk or console I/O.
+
+    :return: The running QueueListener; stop it to flush pending records.
+    """
+    text_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s => %(message)s')
+
+    file_handler = SizeAndTimeRotatingFileHandler(log_file, max_bytes=max_bytes, when=when, backup_count=backup_count)
+    file_handler.setFormatter(JsonFormatter() if json_format else text_formatter)
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(text_formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(rate_limit_burst, rate_limit_interval, debug_sample_rate))
+
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, NonBlockingQueueHandler):
+            root_logger.removeHandler(handler)
+    root_logger.setLevel(level)
+    root_logger.addHandler(queue_handler)
+
+    listener = DropReportingQueueListener(log_queue, file_handler, console_handler, queue_handler=queue_handler,
+                                          respect_handler_level=True)
+    listener.start()
+    return listener
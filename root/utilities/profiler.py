@@ -0,0 +1,183 @@
+import os
+import sys
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+_DISABLED = nullcontext()
+
+
+class StackSampler:
+    """Samples the stack of one thread at a fixed interval and counts the folded stacks."""
+
+    def __init__(self, thread_id: int, interval: float = 0.005) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def stats_to_folded(stats: pstats.Stats) -> Iterator[str]:
+    """
+    Converts cProfile statistics to folded "caller;callee self_time_us" lines.
+
+    cProfile only records caller/callee pairs, so each line is a two level stack; load it with
+    flamegraph.pl or speedscope to see where the self time is spent.
+    """
+    for (filename, line, name), (_, _, self_time, _, callers) in stats.stats.items():
+        callee = f"{name} ({os.path.basename(filename)}:{line})"
+        if not callers:
+            yield f"{callee} {int(self_time * 1e6)}"
+            continue
+        for (c_filename, c_line, c_name), caller_stats in callers.items():
+            caller_self_time = caller_stats[2]
+            if caller_self_time > 0:
+                yield f"{c_name} ({os.path.basename(c_filename)}:{c_line});{callee} {int(caller_self_time * 1e6)}"
+
+
+class StageProfiler:
+    """
+    Optional per-stage CPU and memory profiling of the pipeline.
+
+    When disabled, `section()` returns a shared no-op context manager, so the pipeline pays a single
+    attribute check per stage. When enabled, every selected stage/table is run under cProfile (or a
+    sampling profiler) and tracemalloc, and the reports are written to the output directory:
+
+    - ``<stage>__<table>__<n>.prof``    pstats dump (cprofile mode)
+    - ``<stage>__<table>__<n>.folded``  folded stacks for flame graphs
+    - ``<stage>__<table>__<n>.alloc.txt``  top allocations made during the stage
+
+    Profiled sections are serialized with a lock because tracemalloc is process wide.
+    """
+
+    MODES = ('cprofile', 'sampling')
+
+    def __init__(
+        self,
+        output_dir: str = 'profiles',
+        enabled: bool = False,
+        tables: Optional[Iterable[str]] = None,
+        mode: str = 'cprofile',
+        sample_interval: float = 0.005,
+        top_allocations: int = 25,
+        trace_memory: bool = True,
+    ) -> None:
+        if mode not in self.MODES:
+            raise ValueError(f"Unsupported profiling mode: {mode}")
+        self.enabled = enabled
+        self.tables: Set[str] = {table for table in (tables or []) if table}
+        self.mode = mode
+        self.sample_interval = sample_interval
+        self.top_allocations = top_allocations
+        self.trace_memory = trace_memory
+        self.run_dir = os.path.join(output_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}")
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    def is_selected(self, table: str) -> bool:
+        return self.enabled and (not self.tables or table in self.tables or table == '*')
+
+    def section(self, stage: str, table: str = '*'):
+        """Returns a context manager profiling the given stage for the given table."""
+        if not self.enabled or not self.is_selected(table):
+            return _DISABLED
+        return self._profile(stage, table)
+
+    @contextmanager
+    def _profile(self, stage: str, table: str) -> Iterator[None]:
+        with self._lock:
+            self._counter += 1
+            base_name = os.path.join(self.run_dir, f"{stage}__{table.replace('*', 'all')}__{self._counter:04d}")
+            os.makedirs(self.run_dir, exist_ok=True)
+
+            started_tracing = False
+            if self.trace_memory:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(10)
+                    started_tracing = True
+                tracemalloc.reset_peak()
+                before = tracemalloc.take_snapshot()
+
+            profiler: Optional[cProfile.Profile] = None
+            sampler: Optional[StackSampler] = None
+            if self.mode == 'cprofile':
+                profiler = cProfile.Profile()
+                profiler.enable()
+            else:
+                sampler = StackSampler(threading.get_ident(), self.sample_interval)
+                sampler.start()
+
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                elapsed = time.perf_counter() - start
+                if profiler is not None:
+                    profiler.disable()
+                if sampler is not None:
+                    sampler.stop()
+
+                peak = 0
+                if self.trace_memory:
+                    after = tracemalloc.take_snapshot()
+                    peak = tracemalloc.get_traced_memory()[1]
+                    if started_tracing:
+                        tracemalloc.stop()
+                    self._write_allocations(base_name, before, after, stage, table, elapsed, peak)
+
+                if profiler is not None:
+                    profiler.dump_stats(base_name + '.prof')
+                    self._write_folded(base_name, stats_to_folded(pstats.Stats(profiler)))
+                if sampler is not None:
+                    self._write_folded(base_name, (f"{stack} {count}" for stack, count in sampler.stacks.items()))
+
+                logger.info("Profiled stage=%s table=%s in %.3fs (peak traced memory %.1f MB) -> %s.*",
+                            stage, table, elapsed, peak / (1024 * 1024), base_name)
+
+    @staticmethod
+    def _write_folded(base_name: str, lines: Iterable[str]) -> None:
+        with open(base_name + '.folded', 'w', encoding='utf-8') as f:
+            for line in lines:
+                f.write(line + '\n')
+
+    def _write_allocations(self, base_name: str, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot,
+                           stage: str, table: str, elapsed: float, peak: int) -> None:
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+        diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+        with open(base_name + '.alloc.txt', 'w', encoding='utf-8') as f:
+            f.write(f"stage={stage} table={table} elapsed={elapsed:.3f}s peak={peak / (1024 * 1024):.1f}MB\n")
+            f.write(f"Top {self.top_allocations} allocations by size difference:\n")
+            for stat in diff[:self.top_allocations]:
+                f.write(f"{stat}\n")
@@ -1,24 +1,17 @@
-import logging
+import atexit
 import os
 import time
 
-def setup_logger():
-    # Define global format
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s => %(message)s'
-    )
+from utilities.async_logging import setup_async_logging
 
-    # Create file handler
-    file_handler = logging.FileHandler('ETL.log')
-    file_handler.setFormatter(formatter)
-
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-
-    root_logger = logging.getLogger()
-    root_logger.setLevel(logging.INFO)
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+def setup_logger(**options):
+    """
+    Sends the root logger through a background queue listener (JSON file output with rotation,
+    rate limiting of repeated messages). Options are forwarded to setup_async_logging.
+    """
+    listener = setup_async_logging(**options)
+    atexit.register(listener.stop)
+    return listener
 
 def is_file_stable(file_path, wait_time=1):
     initial_size = os.path.getsize(file_path)